@@ -0,0 +1 @@
+from .all_pairs import all_pairs_distances, all_pairs_distances_by_type, all_pairs_reachable, all_pairs_distance_batches
@@ -0,0 +1,172 @@
+import os
+import pickle
+import tempfile
+import multiprocessing as mp
+from datetime import datetime
+from typing import Any, NamedTuple
+from timeit import default_timer as timer
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from .model import TimeVaryingHypergraph
+from .minimal_paths import ENGINES, COUNTERS, DistanceType, supports
+from .preflight import resident_memory
+from .reach import reachable_vertices, incidence_index
+
+_worker_network: tuple = (None, None)
+_worker_index: tuple = (None, None)
+_EXHAUSTED = object()
+
+
+class DistanceTask(NamedTuple):
+    # The single-source distances of source, computed by _single_source
+    engine: str
+    source: Any
+    distance_type: DistanceType
+    min_timing: Any
+    cutoff: Any
+
+    @property
+    def kind(self) -> str:
+        return self.distance_type.name.lower()
+
+
+class ReachTask(NamedTuple):
+    # The vertices reachable from source until latest, computed by _reachable
+    source: Any
+    latest: Any
+
+    @property
+    def kind(self) -> str:
+        return 'reach'
+
+
+def _load_network(network_path):
+    # Each worker unpickles a network once and keeps it for all following sources.
+    global _worker_network  # pylint: disable=global-statement  # per-process state of the worker
+    if _worker_network[0] != network_path:
+        _worker_network = (None, None)
+        with open(network_path, 'rb') as file:
+            _worker_network = (network_path, pickle.load(file))
+    return _worker_network[1]
+
+
+def _single_source(network_path, task: DistanceTask):
+    single_source_dijkstra = ENGINES[task.engine]
+    hypergraph = _load_network(network_path)
+    start, relaxations = timer(), COUNTERS['relaxations']
+    distances = single_source_dijkstra(hypergraph, task.source, task.distance_type, min_timing=task.min_timing, cutoff=task.cutoff)
+    stats = {'pid': os.getpid(), 'seconds': timer() - start, 'relaxations': COUNTERS['relaxations'] - relaxations, 'rss': resident_memory()}
+    return distances, stats
+
+
+def _reachable(network_path, task: ReachTask):
+    global _worker_index  # pylint: disable=global-statement  # per-process state of the worker
+    hypergraph = _load_network(network_path)
+    if _worker_index[0] != network_path:
+        _worker_index = (network_path, incidence_index(hypergraph))
+    start, relaxations = timer(), COUNTERS['relaxations']
+    reachable = reachable_vertices(hypergraph, task.source, latest=task.latest, index=_worker_index[1])
+    stats = {'pid': os.getpid(), 'seconds': timer() - start, 'relaxations': COUNTERS['relaxations'] - relaxations, 'rss': resident_memory()}
+    return reachable, stats
+
+
+def _all_pairs(hypergraph: TimeVaryingHypergraph, tasks, num_processes, max_pending, executor, telemetry=None, function=_single_source):
+    # Yields (task, result) for tasks (DistanceTask or ReachTask, computed by
+    # function) in order of completion. At most max_pending tasks
+    # are in flight: new tasks are only submitted when the caller asks for the
+    # next result, so a slow consumer throttles the workers instead of
+    # accumulating results. telemetry (see telemetry.Telemetry) is notified of
+    # every submitted task with its future, and of every completed task.
+    num_processes = num_processes or mp.cpu_count()
+    max_pending = max_pending or 2 * num_processes
+
+    file_descriptor, network_path = tempfile.mkstemp(suffix='.pickle')
+    owns_executor = executor is None
+    futures: dict = {}
+    try:
+        with os.fdopen(file_descriptor, 'wb') as file:
+            pickle.dump(hypergraph, file, protocol=pickle.HIGHEST_PROTOCOL)
+        if owns_executor:
+            executor = ProcessPoolExecutor(max_workers=num_processes, mp_context=mp.get_context('spawn'))
+
+        remaining = iter(tasks)
+        while True:
+            while len(futures) < max_pending:
+                task = next(remaining, _EXHAUSTED)
+                if task is _EXHAUSTED:
+                    break
+                future = executor.submit(function, network_path, task)
+                futures[future] = task
+                if telemetry is not None:
+                    telemetry.submitted(task, future)
+            if not futures:
+                break
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = futures.pop(future)
+                distances, stats = future.result()
+                if telemetry is not None:
+                    telemetry.completed(task, stats)
+                yield task, distances
+    finally:
+        for future in futures:
+            future.cancel()
+        if owns_executor and executor is not None:
+            executor.shutdown(cancel_futures=True)
+        os.remove(network_path)
+
+
+def all_pairs_distances(hypergraph: TimeVaryingHypergraph, distance_type: DistanceType, sources=None, engine='hyperedges', min_timing=datetime.min, cutoff=None, num_processes=None, max_pending=None, executor=None):
+    # Yields (source, {target: distance}) in order of completion.
+    if engine not in ENGINES:
+        raise ValueError(f'Unknown engine {engine}')
+    if not supports(engine, distance_type):
+        raise ValueError(f'Engine {engine} does not support {distance_type.name.lower()} distances')
+    sources = sorted(hypergraph.vertices()) if sources is None else list(sources)
+    tasks = (DistanceTask(engine, source, distance_type, min_timing, cutoff) for source in sources)
+    for task, distances in _all_pairs(hypergraph, tasks, num_processes, max_pending, executor):
+        yield task.source, distances
+
+
+def all_pairs_distances_by_type(hypergraph: TimeVaryingHypergraph, distance_types=tuple(DistanceType), sources=None, engines=None, min_timing=datetime.min, cutoffs=None, num_processes=None, max_pending=None, executor=None, telemetry=None):
+    # Yields (distance_type, source, {target: distance}) in order of
+    # completion. The sources of the next distance type are submitted while
+    # the last sources of the previous one are still computed, so no worker
+    # idles between distance types. engines and cutoffs map distance types to
+    # the engine (default 'hyperedges') and cutoff (default None).
+    engines, cutoffs = engines or {}, cutoffs or {}
+    for distance_type in distance_types:
+        if engines.get(distance_type, 'hyperedges') not in ENGINES:
+            raise ValueError(f'Unknown engine {engines[distance_type]}')
+        if not supports(engines.get(distance_type, 'hyperedges'), distance_type):
+            raise ValueError(f'Engine {engines[distance_type]} does not support {distance_type.name.lower()} distances')
+    sources = sorted(hypergraph.vertices()) if sources is None else list(sources)
+    tasks = (DistanceTask(engines.get(distance_type, 'hyperedges'), source, distance_type, min_timing, cutoffs.get(distance_type))
+             for distance_type in distance_types for source in sources)
+    for task, distances in _all_pairs(hypergraph, tasks, num_processes, max_pending, executor, telemetry):
+        yield task.distance_type, task.source, distances
+
+
+def all_pairs_reachable(hypergraph: TimeVaryingHypergraph, sources=None, latest=None, num_processes=None, max_pending=None, executor=None, telemetry=None):
+    # Yields (source, {reachable vertices}) in order of completion, via the
+    # earliest-arrival search without any distances. The reachable vertices
+    # are the targets of the foremost distances with cutoff latest.
+    sources = sorted(hypergraph.vertices()) if sources is None else list(sources)
+    tasks = (ReachTask(source, latest) for source in sources)
+    for task, reachable in _all_pairs(hypergraph, tasks, num_processes, max_pending, executor, telemetry, function=_reachable):
+        yield task.source, reachable
+
+
+def all_pairs_distance_batches(hypergraph: TimeVaryingHypergraph, distance_type: DistanceType, batch_size=1_000_000, **kwargs):
+    # Same as all_pairs_distances, but yields columns {'source': [...],
+    # 'target': [...], 'distance': [...]} of about batch_size rows each.
+    batch: dict = {'source': [], 'target': [], 'distance': []}
+    for source, distances in all_pairs_distances(hypergraph, distance_type, **kwargs):
+        batch['source'] += [source] * len(distances)
+        batch['target'] += distances.keys()
+        batch['distance'] += distances.values()
+        if len(batch['source']) >= batch_size:
+            yield batch
+            batch = {'source': [], 'target': [], 'distance': []}
+    if batch['source']:
+        yield batch
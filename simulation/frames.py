@@ -0,0 +1,128 @@
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from .minimal_paths import DistanceType
+
+# Array types of the distances: hops, durations, and timings (with the microsecond resolution of datetime)
+DTYPES = {int: np.dtype(np.int64), float: np.dtype(np.float64), timedelta: np.dtype('m8[us]'), datetime: np.dtype('M8[us]')}
+
+
+class DistanceFrameBuilder:
+    # Collects single-source results in any order and assembles the final
+    # (source, target) indexed frame directly in sorted order: sources and
+    # targets are stored as category codes of the sorted participants, the
+    # distances of each source as a typed array sorted by target, and each
+    # distance column is written into one preallocated array in final order,
+    # without sorting or aligning any index.
+
+    def __init__(self, participants, distance_types=tuple(DistanceType)):
+        self.participants = tuple(participants)
+        self.distance_types = tuple(distance_types)
+        self.category = pd.api.types.CategoricalDtype(categories=self.participants, ordered=False)
+        self._codes = {participant: code for code, participant in enumerate(self.participants)}
+        self._code_type = np.min_scalar_type(max(len(self.participants) - 1, 0))
+        # Per distance type: source code -> (sorted target codes, distances in the same order)
+        self._results: dict = {distance_type: {} for distance_type in self.distance_types}
+        # Running totals, which can be read from another thread while results are added
+        self._rows = 0
+        self._nbytes = 0
+
+    def __len__(self):
+        return self._rows
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def add(self, distance_type: DistanceType, source, distances: dict):
+        targets = np.fromiter((self._codes[target] for target in distances), dtype=self._code_type, count=len(distances))
+        values = _typed(list(distances.values()))
+        order = np.argsort(targets, kind='stable')
+        self._results[distance_type][self._codes[source]] = (targets[order], values[order])
+        self._rows += len(targets)
+        self._nbytes += targets.nbytes + values.nbytes
+        if values.dtype == object:  # the array only holds references to the objects
+            self._nbytes += sum(map(sys.getsizeof, values))
+
+    def build(self) -> pd.DataFrame:
+        sources, targets = [], []
+        for source_code in range(len(self.participants)):
+            present = [results[source_code][0] for results in self._results.values() if source_code in results]
+            if not present:
+                continue
+            if all(len(result_targets) == len(present[0]) and np.array_equal(result_targets, present[0]) for result_targets in present):
+                targets += [present[0]]
+            else:  # distance types reached different targets, e.g., because of cutoffs
+                targets += [np.unique(np.concatenate(present))]
+            sources += [source_code]
+        offsets = np.concatenate([[0], np.cumsum([len(source_targets) for source_targets in targets], dtype=np.intp)])
+
+        source_codes = np.repeat(np.array(sources, dtype=self._code_type), np.diff(offsets))
+        target_codes = np.concatenate(targets) if targets else np.empty(0, dtype=self._code_type)
+        levels = [pd.CategoricalIndex(self.participants, dtype=self.category, name=name) for name in ('source', 'target')]
+        index = pd.MultiIndex(levels=levels, codes=[source_codes, target_codes], names=['source', 'target'], verify_integrity=False)
+
+        columns = {distance_type.name.lower(): self._column(distance_type, sources, targets, offsets) for distance_type in self.distance_types}
+        return pd.DataFrame(columns, index=index, copy=False)
+
+    def _column(self, distance_type: DistanceType, sources, targets, offsets):
+        # The column has the dtype that pandas infers for the distances, and
+        # missing values (NaN or NaT) where pandas would place them when
+        # aligning the distance types, so the frame equals the one of sorting
+        # the collected rows.
+        results = self._results[distance_type]
+        length = offsets[-1]
+        sample = _inferred_sample([values for _, values in results.values() if len(values)])
+        complete = sum(len(values) for _, values in results.values()) == length
+        column = np.empty(length, dtype=object if sample is None else sample.dtype if complete else _missing_dtype(sample.dtype))
+        if not complete:
+            column[:] = np.array('NaT', dtype=column.dtype) if column.dtype.kind in 'mM' else np.nan
+        for source_code, source_targets, start, end in zip(sources, targets, offsets[:-1], offsets[1:]):
+            if source_code not in results:
+                continue
+            result_targets, values = results[source_code]
+            if len(result_targets) == end - start:
+                column[start:end] = values
+            else:
+                column[start + np.searchsorted(source_targets, result_targets)] = values
+        if sample is None:  # objects that numpy does not type, e.g., timezone-aware timings, are typed by pandas
+            return pd.Series(column.tolist(), dtype=None if length else object)._values  # pylint: disable=protected-access  # the array pandas infers, not a copy
+        if not isinstance(sample, np.ndarray):
+            # Durations and timings are wrapped like pandas wraps its own
+            # arrays, sharing the dtype with the buffer, which gives the same
+            # pickle as taking them from an inferred column.
+            return sample._from_backing_data(column)  # pylint: disable=protected-access  # no public constructor shares the dtype object
+        return column
+
+
+def _typed(values: list) -> np.ndarray:
+    # The values as an array of their type in DTYPES if they all have the same, else as an object array
+    types = set(map(type, values))
+    dtype = DTYPES.get(types.pop()) if len(types) == 1 else None
+    if dtype is not None and (dtype.kind != 'M' or all(value.tzinfo is None for value in values)):
+        try:
+            return np.array(values, dtype=dtype)
+        except OverflowError:  # integers beyond int64
+            pass
+    return np.fromiter(values, dtype=object, count=len(values))
+
+
+def _inferred_sample(arrays):
+    # A one-element array as pandas infers it for the values of the arrays, or None if they are objects or of different types
+    dtypes = {array.dtype for array in arrays}
+    if len(dtypes) != 1 or np.dtype(object) in dtypes:
+        return None
+    sample = pd.Series(arrays[0][:1].tolist())._values  # pylint: disable=protected-access  # the array pandas infers, not a copy
+    return sample if isinstance(sample.dtype, np.dtype) else None
+
+
+def _missing_dtype(dtype: np.dtype) -> np.dtype:
+    # The dtype pandas uses for a column of this dtype with missing values
+    if dtype.kind in 'iu':
+        return np.dtype(np.float64)
+    if dtype.kind == 'b':
+        return np.dtype(object)
+    return dtype
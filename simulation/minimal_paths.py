@@ -1,5 +1,8 @@
 import heapq
+import weakref
+from bisect import bisect_right
 from enum import Enum
+from collections import defaultdict
 from datetime import datetime
 
 from .model import TimeVaryingHypergraph
@@ -11,9 +14,36 @@ class DistanceType(Enum):
     FOREMOST = 2
 
 
-def single_source_dijkstra_hyperedges(hypergraph: TimeVaryingHypergraph, source_vertex, distance_type: DistanceType, min_timing=datetime.min):
+# Number of relaxations (improved distances pushed to the queue) of all
+# single-source searches in this process, reported by the run telemetry
+COUNTERS = {'relaxations': 0}
+
+_incidence_cache: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def time_sorted_incidence(hypergraph: TimeVaryingHypergraph) -> dict:
+    # Timings and hyperedges of each vertex sorted by timing. The index of the
+    # last hypergraph is kept for the following searches on it, but only as
+    # long as the hypergraph itself is alive.
+    incidence = _incidence_cache.get(hypergraph)
+    if incidence is None:
+        _incidence_cache.clear()
+        incidence = {}
+        for vertex in hypergraph.vertices():
+            hedges = sorted(hypergraph.hyperedges(vertex), key=hypergraph.timings)
+            incidence[vertex] = (tuple(hypergraph.timings(hedge) for hedge in hedges), tuple(hedges))
+        _incidence_cache[hypergraph] = incidence
+    return incidence
+
+
+# A cutoff bounds the search horizon in the unit of the distance type: the
+# number of hops (SHORTEST), a maximum duration (FASTEST), or the latest
+# timing (FOREMOST). Hyperedges beyond the cutoff are not expanded.
+
+def single_source_dijkstra_hyperedges(hypergraph: TimeVaryingHypergraph, source_vertex, distance_type: DistanceType, min_timing=datetime.min, cutoff=None):
     hedge_distances: dict = {}
     queue: list = []
+    relaxations = 0
 
     for source_hedge in hypergraph.hyperedges(source_vertex):
         match distance_type:
@@ -23,6 +53,8 @@ def single_source_dijkstra_hyperedges(hypergraph: TimeVaryingHypergraph, source_
                 init_value = min_timing - min_timing
             case DistanceType.FOREMOST:
                 init_value = hypergraph.timings(source_hedge)
+        if cutoff is not None and init_value > cutoff:
+            continue
         heapq.heappush(queue, (init_value, source_hedge))
         hedge_distances[source_hedge] = init_value
 
@@ -40,22 +72,29 @@ def single_source_dijkstra_hyperedges(hypergraph: TimeVaryingHypergraph, source_
                             new_distance = prior_distance + (next_hedge_timing - source_hedge_timing)
                         case DistanceType.FOREMOST:
                             new_distance = next_hedge_timing
+                    if cutoff is not None and new_distance > cutoff:
+                        continue
                     if next_hedge not in hedge_distances or new_distance < hedge_distances[next_hedge]:
                         hedge_distances[next_hedge] = new_distance
                         heapq.heappush(queue, (new_distance, next_hedge))
+                        relaxations += 1
 
     vertex_distances: dict = {}
     for source_hedge, distance in hedge_distances.items():
         for vertex in hypergraph.vertices(source_hedge):
             if vertex not in vertex_distances or distance < vertex_distances[vertex]:
                 vertex_distances[vertex] = distance
-    vertex_distances.pop(source_vertex)
+    vertex_distances.pop(source_vertex, None)  # absent if a cutoff excludes all hyperedges of the source
+    COUNTERS['relaxations'] += relaxations
     return vertex_distances
 
 
-def single_source_dijkstra_vertices(hypergraph: TimeVaryingHypergraph, source_vertex, distance_type: DistanceType, min_timing=datetime.min):
+def single_source_dijkstra_vertices(hypergraph: TimeVaryingHypergraph, source_vertex, distance_type: DistanceType, min_timing=datetime.min, cutoff=None):
     distances: dict = {}
+    labels: dict = defaultdict(dict)  # Pareto-optimal labels per vertex: hedge -> (timing, key)
     queue: list = []
+    reference_timing = None
+    relaxations = 0
 
     source_hedge = None
     source_reachable = (source_vertex, source_hedge)
@@ -72,30 +111,232 @@ def single_source_dijkstra_vertices(hypergraph: TimeVaryingHypergraph, source_ve
     heapq.heappush(queue, (init_distance, source_reachable))
 
     while queue:
-        distance, (vertex, source_hedge) = heapq.heappop(queue)
+        distance, reachable = heapq.heappop(queue)
+        if distances.get(reachable) != distance:  # stale or dominated since it was pushed
+            continue
+        vertex, source_hedge = reachable
+        if source_hedge is not None:
+            source_hedge_timing = hypergraph.timings(source_hedge)
         for next_hedge in hypergraph.hyperedges(vertex):
-            if source_hedge:
-                source_hedge_timing = hypergraph.timings(source_hedge)
-            else:  # damn source_hedge
-                source_hedge_timing = hypergraph.timings(next_hedge)
             next_hedge_timing = hypergraph.timings(next_hedge)
-            if not source_hedge or source_hedge_timing < next_hedge_timing:
-                for next_vertex in hypergraph.vertices(next_hedge):
-                    new_reachable = (next_vertex, next_hedge)
-                    match distance_type:
-                        case DistanceType.SHORTEST:
-                            new_distance = distance + 1
-                        case DistanceType.FASTEST:
-                            new_distance = distance + (next_hedge_timing - source_hedge_timing)
-                        case DistanceType.FOREMOST:
-                            new_distance = next_hedge_timing
-                    if new_reachable not in distances or new_distance < distances[new_reachable]:
-                        distances[new_reachable] = new_distance
-                        heapq.heappush(queue, (new_distance, new_reachable))
+            if source_hedge is None:  # the source may start at any of its hyperedges
+                source_hedge_timing = next_hedge_timing
+            elif source_hedge_timing >= next_hedge_timing:
+                continue
+            match distance_type:
+                case DistanceType.SHORTEST:
+                    new_distance = distance + 1
+                case DistanceType.FASTEST:
+                    new_distance = distance + (next_hedge_timing - source_hedge_timing)
+                case DistanceType.FOREMOST:
+                    new_distance = next_hedge_timing
+            if cutoff is not None and new_distance > cutoff:
+                continue
+            # A label dominates another label of the same vertex if it arrives no
+            # later and no continuation from it can end up with a larger distance:
+            # it has no larger distance (SHORTEST), departed no earlier (FASTEST),
+            # or arrived no later (FOREMOST). Dominance is checked on label keys
+            # where a smaller key is better.
+            match distance_type:
+                case DistanceType.SHORTEST:
+                    new_key = new_distance
+                case DistanceType.FASTEST:
+                    if reference_timing is None:
+                        reference_timing = next_hedge_timing
+                    new_key = new_distance - (next_hedge_timing - reference_timing)  # negated departure
+                case DistanceType.FOREMOST:
+                    new_key = next_hedge_timing
+            for next_vertex in hypergraph.vertices(next_hedge):
+                if next_vertex == source_vertex:  # nothing beats starting at the source
+                    continue
+                vertex_labels = labels[next_vertex]
+                if any(timing <= next_hedge_timing and key <= new_key for timing, key in vertex_labels.values()):
+                    continue
+                for hedge in [hedge for hedge, (timing, key) in vertex_labels.items() if next_hedge_timing <= timing and new_key <= key]:
+                    del vertex_labels[hedge]
+                    del distances[(next_vertex, hedge)]
+                new_reachable = (next_vertex, next_hedge)
+                vertex_labels[next_hedge] = (next_hedge_timing, new_key)
+                distances[new_reachable] = new_distance
+                heapq.heappush(queue, (new_distance, new_reachable))
+                relaxations += 1
     minimal_distances: dict = {}
     for (vertex, _), distance in distances.items():
         if vertex not in minimal_distances or distance < minimal_distances[vertex]:
             minimal_distances[vertex] = distance
     minimal_distances.pop(source_vertex)
+    COUNTERS['relaxations'] += relaxations
 
     return minimal_distances
+
+
+def single_pair_dijkstra_hyperedges(hypergraph: TimeVaryingHypergraph, source_vertex, target_vertex, distance_type: DistanceType, min_timing=datetime.min, cutoff=None):
+    # Hyperedges are popped in order of their distance, so the first popped
+    # hyperedge incident to the target settles the target's minimal distance.
+    hypergraph.hyperedges(target_vertex)  # raises EntityNotFound for an unknown target
+    if source_vertex == target_vertex:
+        return None
+
+    hedge_distances: dict = {}
+    queue: list = []
+
+    for source_hedge in hypergraph.hyperedges(source_vertex):
+        match distance_type:
+            case DistanceType.SHORTEST:
+                init_value = 1
+            case DistanceType.FASTEST:
+                init_value = min_timing - min_timing
+            case DistanceType.FOREMOST:
+                init_value = hypergraph.timings(source_hedge)
+        if cutoff is not None and init_value > cutoff:
+            continue
+        heapq.heappush(queue, (init_value, source_hedge))
+        hedge_distances[source_hedge] = init_value
+
+    while queue:
+        prior_distance, source_hedge = heapq.heappop(queue)
+        if prior_distance > hedge_distances[source_hedge]:
+            continue
+        source_hedge_vertices = hypergraph.vertices(source_hedge)
+        if target_vertex in source_hedge_vertices:
+            return prior_distance
+        source_hedge_timing = hypergraph.timings(source_hedge)
+        for vertex in source_hedge_vertices:
+            for next_hedge in hypergraph.hyperedges(vertex):
+                next_hedge_timing = hypergraph.timings(next_hedge)
+                if source_hedge_timing < next_hedge_timing:
+                    match distance_type:
+                        case DistanceType.SHORTEST:
+                            new_distance = prior_distance + 1
+                        case DistanceType.FASTEST:
+                            new_distance = prior_distance + (next_hedge_timing - source_hedge_timing)
+                        case DistanceType.FOREMOST:
+                            new_distance = next_hedge_timing
+                    if cutoff is not None and new_distance > cutoff:
+                        continue
+                    if next_hedge not in hedge_distances or new_distance < hedge_distances[next_hedge]:
+                        hedge_distances[next_hedge] = new_distance
+                        heapq.heappush(queue, (new_distance, next_hedge))
+    return None
+
+
+def single_target_dijkstra_hyperedges(hypergraph: TimeVaryingHypergraph, target_vertex, distance_type: DistanceType, min_timing=datetime.min, cutoff=None):
+    # Reverse search: walk hyperedges backward in time from the target. The
+    # distance of a hyperedge is the minimal distance from that hyperedge to
+    # the target, so it is seeded at the target's hyperedges and, for FOREMOST,
+    # carries the arrival timing at the target unchanged.
+    hedge_distances: dict = {}
+    queue: list = []
+
+    for target_hedge in hypergraph.hyperedges(target_vertex):
+        match distance_type:
+            case DistanceType.SHORTEST:
+                init_value = 1
+            case DistanceType.FASTEST:
+                init_value = min_timing - min_timing
+            case DistanceType.FOREMOST:
+                init_value = hypergraph.timings(target_hedge)
+        if cutoff is not None and init_value > cutoff:
+            continue
+        heapq.heappush(queue, (init_value, target_hedge))
+        hedge_distances[target_hedge] = init_value
+
+    while queue:
+        prior_distance, target_hedge = heapq.heappop(queue)
+        if prior_distance > hedge_distances[target_hedge]:
+            continue
+        target_hedge_timing = hypergraph.timings(target_hedge)
+        for vertex in hypergraph.vertices(target_hedge):
+            for prior_hedge in hypergraph.hyperedges(vertex):
+                prior_hedge_timing = hypergraph.timings(prior_hedge)
+                if prior_hedge_timing < target_hedge_timing:
+                    match distance_type:
+                        case DistanceType.SHORTEST:
+                            new_distance = prior_distance + 1
+                        case DistanceType.FASTEST:
+                            new_distance = prior_distance + (target_hedge_timing - prior_hedge_timing)
+                        case DistanceType.FOREMOST:
+                            new_distance = prior_distance
+                    if cutoff is not None and new_distance > cutoff:
+                        continue
+                    if prior_hedge not in hedge_distances or new_distance < hedge_distances[prior_hedge]:
+                        hedge_distances[prior_hedge] = new_distance
+                        heapq.heappush(queue, (new_distance, prior_hedge))
+
+    vertex_distances: dict = {}
+    for target_hedge, distance in hedge_distances.items():
+        for vertex in hypergraph.vertices(target_hedge):
+            if vertex not in vertex_distances or distance < vertex_distances[vertex]:
+                vertex_distances[vertex] = distance
+    vertex_distances.pop(target_vertex, None)
+    return vertex_distances
+
+
+def single_source_fastest_profile(hypergraph: TimeVaryingHypergraph, source_vertex, distance_type: DistanceType = DistanceType.FASTEST, min_timing=datetime.min, cutoff=None):  # pylint: disable=unused-argument  # the signature of all ENGINES
+    # The fastest distance of a hyperedge is its timing minus the latest
+    # departure (a hyperedge of the source) it can be reached from. Departures
+    # are searched from the latest to the earliest, so the first departure
+    # that reaches a hyperedge settles it, and a hyperedge reached again from
+    # an earlier departure is pruned with everything reachable from it. No
+    # queue is needed, and every hyperedge is expanded at most once for all
+    # departures together. Moreover, a vertex once expanded at some arrival
+    # has all its later hyperedges settled, so later expansions of the vertex
+    # only scan its hyperedges before that arrival.
+    if distance_type != DistanceType.FASTEST:
+        raise ValueError(f'The fastest profile search does not support {distance_type.name.lower()} distances')
+    hypergraph.hyperedges(source_vertex)  # raises EntityNotFound for an unknown source
+    incidence = time_sorted_incidence(hypergraph)
+    hedge_distances: dict = {}
+    expanded: dict = {}  # vertex -> earliest arrival the vertex was expanded at
+    relaxations = 0
+
+    departure_timings, departures = incidence[source_vertex]
+    for departure_timing, departure in zip(reversed(departure_timings), reversed(departures)):
+        init_value = departure_timing - departure_timing
+        if cutoff is not None and init_value > cutoff:
+            continue
+        hedge_distances[departure] = init_value
+        stack = [departure]
+        while stack:
+            hedge = stack.pop()
+            hedge_timing = hypergraph.timings(hedge)
+            for vertex in hypergraph.vertices(hedge):
+                timings, hedges = incidence[vertex]
+                start = bisect_right(timings, hedge_timing)
+                end = bisect_right(timings, expanded[vertex]) if vertex in expanded else len(timings)
+                if start >= end:
+                    continue
+                expanded[vertex] = hedge_timing
+                for i in range(start, end):
+                    next_hedge_timing = timings[i]
+                    if cutoff is not None and next_hedge_timing - departure_timing > cutoff:
+                        break
+                    next_hedge = hedges[i]
+                    if next_hedge not in hedge_distances:
+                        hedge_distances[next_hedge] = next_hedge_timing - departure_timing
+                        stack.append(next_hedge)
+                        relaxations += 1
+
+    vertex_distances: dict = {}
+    for hedge, distance in hedge_distances.items():
+        for vertex in hypergraph.vertices(hedge):
+            if vertex not in vertex_distances or distance < vertex_distances[vertex]:
+                vertex_distances[vertex] = distance
+    vertex_distances.pop(source_vertex, None)
+    COUNTERS['relaxations'] += relaxations
+    return vertex_distances
+
+
+ENGINES = {
+    'hyperedges': single_source_dijkstra_hyperedges,
+    'vertices': single_source_dijkstra_vertices,
+    'fastest_profile': single_source_fastest_profile,
+}
+# Distance types of engines that do not support all of them
+ENGINE_DISTANCE_TYPES = {
+    'fastest_profile': (DistanceType.FASTEST, ),
+}
+
+
+def supports(engine, distance_type: DistanceType) -> bool:
+    return distance_type in ENGINE_DISTANCE_TYPES.get(engine, tuple(DistanceType))
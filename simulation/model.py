@@ -2,6 +2,7 @@ from datetime import datetime
 from collections import defaultdict
 from pathlib import Path
 import bz2
+import sys
 
 try:
     import orjson as json
@@ -13,14 +14,53 @@ class EntityNotFound(Exception):
     pass
 
 
+def _intern(entity):
+    return sys.intern(entity) if isinstance(entity, str) else entity
+
+
+def compact_channels(hedges: dict, timings: dict):
+    # Drops the hyperedges that cannot change any minimal path, for all
+    # distance types:
+    # - Hyperedges with at most one vertex: a path via such a hyperedge can
+    #   continue from its predecessor directly, since that shares the vertex
+    #   and is earlier, and for the source, its hyperedges are seeds anyway.
+    # - All but the first of hyperedges with the same vertices and timing:
+    #   they are seeded and relaxed exactly alike.
+    # Returns the remaining hyperedges and timings, all vertices (including
+    # those left without hyperedges), and the original hyperedges that each
+    # remaining hyperedge stands for.
+    compacted, compacted_timings, vertices = {}, {}, {}
+    origins: dict = defaultdict(list)
+    first = {}
+    for hedge, _vertices in hedges.items():
+        _vertices = tuple(dict.fromkeys(_vertices))
+        vertices.update(dict.fromkeys(_vertices))
+        if len(_vertices) <= 1:
+            continue
+        key = (frozenset(_vertices), timings[hedge])
+        if key in first:
+            origins[first[key]].append(hedge)
+            continue
+        first[key] = hedge
+        compacted[hedge] = _vertices
+        compacted_timings[hedge] = timings[hedge]
+        origins[hedge].append(hedge)
+    return compacted, compacted_timings, tuple(vertices), {hedge: tuple(_hedges) for hedge, _hedges in origins.items()}
+
+
 class TimeVaryingHypergraph:
-    def __init__(self, hedges: dict, timings: dict):
-        self._vertices = defaultdict(list)
-        for hedge, _vertices in hedges.items():
+    __slots__ = ('_vertices', '_hedges', '_timings', '__weakref__')  # weak references let indices die with the hypergraph
+
+    def __init__(self, hedges: dict, timings: dict, vertices=()):
+        # Incidences are frozen into tuples once, which are smaller than lists or sets
+        self._hedges = {hedge: tuple(dict.fromkeys(_vertices)) for hedge, _vertices in hedges.items()}
+
+        _hedges_of = {vertex: [] for vertex in vertices}  # including vertices without any hyperedge
+        for hedge, _vertices in self._hedges.items():
             for vertex in _vertices:
-                self._vertices[vertex] += [hedge]
+                _hedges_of.setdefault(vertex, []).append(hedge)
+        self._vertices = {vertex: tuple(_hedges) for vertex, _hedges in _hedges_of.items()}
 
-        self._hedges = hedges
         self._timings = timings
 
     def timings(self, entity=None):
@@ -44,10 +84,13 @@ class TimeVaryingHypergraph:
 
 
 class CommunicationNetwork(TimeVaryingHypergraph):
+    __slots__ = ('name', 'channel_origins')
 
-    def __init__(self, channels, channel_timings, name=None):
-        super().__init__(channels, channel_timings)
+    def __init__(self, channels, channel_timings, name=None, participants=(), channel_origins=None):
+        super().__init__(channels, channel_timings, vertices=participants)
         self.name = name
+        # For a compacted network: the original channels each channel stands for
+        self.channel_origins = channel_origins
 
     def channels(self, participant=None):
         return self.hyperedges(participant)
@@ -56,14 +99,27 @@ class CommunicationNetwork(TimeVaryingHypergraph):
         return self.vertices(channel)
 
     @classmethod
-    def from_json(cls, file_path, name=None):
+    def from_json(cls, file_path, name=None, compact=False):
         file_path = Path(file_path)
         with file_path.open('rb') as file:
             if file_path.suffix == '.bz2':
                 raw_data = json.loads(bz2.decompress(file.read()))
             else:
                 raw_data = json.loads(file.read())
-            hedges = {str(chan_id): set(channel['participants']) for chan_id, channel in raw_data.items()}
-            timings = {str(chan_id): datetime.fromisoformat(channel['end']) for chan_id, channel in raw_data.items()}
-
+        # Interning makes all occurrences of an ID share one string object
+        hedges, timings = {}, {}
+        for chan_id, channel in raw_data.items():
+            chan_id = sys.intern(str(chan_id))
+            hedges[chan_id] = tuple(_intern(participant) for participant in channel['participants'])
+            timings[chan_id] = datetime.fromisoformat(channel['end'])
+        raw_data = None
+
+        if compact:
+            return cls.compacted(hedges, timings, name=name)
         return cls(hedges, timings, name=name)
+
+    @classmethod
+    def compacted(cls, channels, channel_timings, name=None):
+        # A network with the same minimal paths without redundant channels (see compact_channels)
+        channels, channel_timings, participants, channel_origins = compact_channels(channels, channel_timings)
+        return cls(channels, channel_timings, name=name, participants=participants, channel_origins=channel_origins)
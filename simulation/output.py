@@ -0,0 +1,164 @@
+import io
+import os
+import bz2
+from pathlib import Path
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    from lz4 import frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+# bz2 compresses in blocks of 900 kB of input at level 9, so larger chunks of
+# independently compressed streams barely affect the compression ratio.
+BLOCK_SIZE = 10 * 900_000
+
+
+class Compression:
+    # A codec either compresses blocks independently with compress(block),
+    # which the shared threads run in parallel (the blocks are concatenated
+    # as streams or frames), or creates one stateful compressor per file with
+    # compressor(num_threads=...), which sees the blocks in order.
+    def __init__(self, suffix, compress=None, compressor=None, available=True):
+        if (compress is None) == (compressor is None):
+            raise ValueError('A compression needs either compress or compressor')
+        self.suffix = suffix
+        self.compress = compress
+        self.compressor = compressor
+        self.available = available
+
+    @property
+    def parallel(self):
+        return self.compress is not None
+
+
+def _bz2_compressor(**_):  # single-threaded
+    return bz2.BZ2Compressor(9)
+
+
+def _bz2_compress(block):
+    return bz2.compress(block, 9)
+
+
+def _zstd_compressor(num_threads=1):
+    return zstandard.ZstdCompressor(level=9, threads=num_threads).compressobj()
+
+
+def _lz4_compress(block):
+    return lz4_frame.compress(block)
+
+
+COMPRESSIONS = {
+    # One bz2 stream at level 9, byte-identical to pandas' compression='bz2'
+    'bz2': Compression('.bz2', compressor=_bz2_compressor),
+    # Concatenated bz2 streams, as pbzip2 writes them; bz2, pandas, and bzip2 decompress them as one file
+    'bz2-parallel': Compression('.bz2', compress=_bz2_compress),
+    # One zstd frame, compressed by zstd's own worker threads
+    'zstd': Compression('.zst', compressor=_zstd_compressor, available=zstandard is not None),
+    # Concatenated lz4 frames
+    'lz4': Compression('.lz4', compress=_lz4_compress, available=lz4_frame is not None),
+}
+
+
+class CompressedWriter(io.BufferedIOBase):
+    # Binary file object that cuts the written data into blocks and compresses
+    # them in the background while the caller keeps serializing. At most
+    # max_pending blocks are held in memory; the compressed blocks are written
+    # in order.
+
+    def __init__(self, path, compression: Compression, executor: ThreadPoolExecutor, num_threads=1, block_size=BLOCK_SIZE, max_pending=None):
+        super().__init__()
+        self.compression = compression
+        self.block_size = block_size
+        self.max_pending = max_pending or 2 * num_threads
+        self._buffer = bytearray()
+        self._pending: deque = deque()
+        if compression.parallel:
+            self._executor, self._compressor, self._compress = executor, None, compression.compress
+        else:  # a stateful compressor must see the blocks in order
+            self._executor = ThreadPoolExecutor(max_workers=1)
+            self._compressor = compression.compressor(num_threads=num_threads)
+            self._compress = self._compressor.compress
+        self._file = open(path, 'wb')  # pylint: disable=consider-using-with  # held until close(), like any file object
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        if self.closed:
+            raise ValueError('I/O operation on closed file.')
+        with memoryview(data) as view:  # pickle writes large buffers as PickleBuffer
+            self._buffer += view
+            size = view.nbytes
+        while len(self._buffer) >= self.block_size:
+            self._submit()
+        return size
+
+    def _submit(self):
+        block, self._buffer = bytes(self._buffer[:self.block_size]), self._buffer[self.block_size:]
+        self._pending.append(self._executor.submit(self._compress, block))
+        self._drain(self.max_pending)
+
+    def _drain(self, max_pending=0):
+        while self._pending and (self._pending[0].done() or len(self._pending) > max_pending):
+            self._file.write(self._pending.popleft().result())
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            while self._buffer:
+                self._submit()
+            self._drain()
+            if self._compressor is not None:
+                self._file.write(self._compressor.flush())
+        finally:
+            for future in self._pending:
+                future.cancel()
+            if self._executor is not None and not self.compression.parallel:
+                self._executor.shutdown()
+            self._file.close()
+            super().close()
+
+
+def write_csv(result: pd.DataFrame, file):
+    result.to_csv(file, mode='wb')
+
+
+def write_pickle(result: pd.DataFrame, file):
+    result.to_pickle(file, compression=None)
+
+
+def write_results(result: pd.DataFrame, path, compression='bz2', num_threads=None) -> list:
+    # Writes <path>.csv<suffix> and <path>.pickle<suffix> concurrently. With
+    # the default 'bz2', both files are identical to pandas' to_csv and
+    # to_pickle with compression='bz2'.
+    if compression not in COMPRESSIONS:
+        raise ValueError(f'Unknown compression {compression}')
+    compression = COMPRESSIONS[compression]
+    if not compression.available:
+        raise ValueError(f'Compression {compression.suffix} requires an optional library that is not installed')
+    num_threads = num_threads or os.cpu_count() or 1
+
+    writers = {f'{path}.csv{compression.suffix}': write_csv, f'{path}.pickle{compression.suffix}': write_pickle}
+    with ThreadPoolExecutor(max_workers=num_threads) as executor, ThreadPoolExecutor(max_workers=len(writers)) as serializers:
+        def write(file_path, writer):
+            try:
+                with CompressedWriter(file_path, compression, executor, num_threads) as file:
+                    writer(result, file)
+            except BaseException:
+                Path(file_path).unlink(missing_ok=True)  # no truncated results
+                raise
+
+        futures = [serializers.submit(write, file_path, writer) for file_path, writer in writers.items()]
+        for future in futures:
+            future.result()
+    return list(writers)
@@ -0,0 +1,295 @@
+import os
+import sys
+import bz2
+import pickle
+import random
+import statistics
+import multiprocessing as mp
+from datetime import timedelta
+from timeit import default_timer as timer
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+from .model import TimeVaryingHypergraph
+from .minimal_paths import ENGINES, DistanceType, supports
+from .reach import incidence_index, reachable_vertices
+
+# Empirical ratio between the memory a loaded hypergraph takes in a worker
+# process and the size of its pickle.
+PICKLE_TO_MEMORY_RATIO = 4
+# Baseline memory of a spawned worker process (interpreter and imports).
+WORKER_BASE_MEMORY = 100 * 2**20
+# Memory held in the parent by DistanceFrameBuilder for all distance types at
+# once: per source and distance type, a tuple of two arrays in a dict, and per
+# reached target and distance type, a target code and a 64-bit distance. Its
+# build() adds the source and target codes (which the index copies once more)
+# and the 64-bit distance columns of the frame rows, which the pickle holds.
+BYTES_PER_SOURCE_RESULT = 2 * sys.getsizeof(np.empty(0)) + sys.getsizeof((None, None)) + 32
+BYTES_PER_DISTANCE = 8
+# Memory held in the parent per source for reach counts (one 32-bit count).
+BYTES_PER_REACH_COUNT = 4
+
+
+def distribution(values) -> dict:
+    values = sorted(values)
+    if not values:
+        return {'min': 0, 'median': 0, 'mean': 0, 'p99': 0, 'max': 0}
+    return {
+        'min': values[0],
+        'median': statistics.median(values),
+        'mean': statistics.fmean(values),
+        'p99': values[min(len(values) - 1, int(len(values) * 0.99))],
+        'max': values[-1],
+    }
+
+
+def network_statistics(hypergraph: TimeVaryingHypergraph) -> dict:
+    degrees = [len(hypergraph.hyperedges(vertex)) for vertex in hypergraph.vertices()]
+    hedge_sizes = [len(hypergraph.vertices(hedge)) for hedge in hypergraph.hyperedges()]
+    return {
+        'vertices': len(degrees),
+        'hyperedges': len(hedge_sizes),
+        'incidence': sum(hedge_sizes),
+        'degree': distribution(degrees),
+        'hyperedge_size': distribution(hedge_sizes),
+    }
+
+
+def available_memory():
+    # Memory available for new processes without swapping in bytes (free
+    # memory plus the reclaimable page cache), or None if unknown
+    try:
+        with open('/proc/meminfo', encoding='ascii') as file:
+            for line in file:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def free_memory():
+    # Free memory in bytes, which excludes the page cache the kernel would
+    # reclaim and thus underestimates the available memory, or None if unknown
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_AVPHYS_PAGES')
+    except (ValueError, OSError, AttributeError):  # not available on all platforms
+        return None
+
+
+def resident_memory():
+    # Current resident set size of this process in bytes, or None if unknown
+    try:
+        with open('/proc/self/statm', encoding='ascii') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # peak only; bytes on macOS, KB elsewhere
+
+
+def sample_costs(hypergraph: TimeVaryingHypergraph, sources, engines, distance_types, cutoffs=None) -> dict:
+    cutoffs = cutoffs or {}
+    costs = {}
+    for distance_type in distance_types:
+        for engine in engines:
+            if not supports(engine, distance_type):
+                continue
+            single_source_dijkstra = ENGINES[engine]
+            seconds, results = 0.0, {}
+            for source in sources:
+                start = timer()
+                results[source] = single_source_dijkstra(hypergraph, source, distance_type, cutoff=cutoffs.get(distance_type))
+                seconds += timer() - start
+            costs[(distance_type, engine)] = {
+                'seconds_per_source': seconds / len(sources),
+                'reached_per_source': sum(len(distances) for distances in results.values()) / len(sources),
+                'results': results,
+            }
+    return costs
+
+
+def sample_sources(hypergraph: TimeVaryingHypergraph, sample_size, seed=0) -> list:
+    participants = sorted(hypergraph.vertices())
+    return random.Random(seed).sample(participants, min(sample_size, len(participants)))
+
+
+class PreflightBase:
+    # Network statistics, worker memory, and the pool plan that the preflights
+    # share. They only differ in what they sample (see _sample), which sets
+    # seconds_per_source, parent_memory, and output_size.
+
+    def __init__(self, hypergraph: TimeVaryingHypergraph, num_processes=None, sample_size=5, seed=0):
+        self.statistics = network_statistics(hypergraph)
+        self.num_sources = self.statistics['vertices']
+        self.worker_memory = WORKER_BASE_MEMORY + PICKLE_TO_MEMORY_RATIO * len(pickle.dumps(hypergraph))
+        self._sample(hypergraph, sample_sources(hypergraph, sample_size, seed))
+        self.plan(num_processes)
+
+    def _sample(self, hypergraph: TimeVaryingHypergraph, sources):
+        raise NotImplementedError
+
+    def plan(self, num_processes=None, reusable_memory=0):
+        # Sizes the pool for the memory available now, plus reusable_memory
+        # held by existing workers that will compute this network instead
+        self.available_memory = available_memory()
+        # Only a measured available memory is reliable enough to refuse a run
+        self.reliable_memory = self.available_memory is not None
+        if not self.reliable_memory:
+            self.available_memory = free_memory()
+        if self.available_memory is not None:
+            self.available_memory += reusable_memory
+        if num_processes is None:
+            num_processes = mp.cpu_count()
+            if self.available_memory is not None:
+                # Workers only get the memory left after the results in the parent, which fewer workers do not shrink
+                num_processes = min(num_processes, int((self.available_memory - self.parent_memory) // self.worker_memory))
+        self.num_processes = max(1, min(num_processes, self.num_sources or 1))
+        self.memory = self.parent_memory + self.num_processes * self.worker_memory
+        self.fits = self.available_memory is None or self.memory <= self.available_memory
+        self.seconds = self.seconds_per_source * self.num_sources / self.num_processes
+
+    def report(self) -> str:
+        stats = self.statistics
+        lines = [
+            f'Network: {stats["vertices"]:,} vertices, {stats["hyperedges"]:,} hyperedges, {stats["incidence"]:,} incidences',
+            f'  Degree:          {_format_distribution(stats["degree"])}',
+            f'  Hyperedge size:  {_format_distribution(stats["hyperedge_size"])}',
+        ]
+        lines += self._cost_lines()
+        lines += [
+            f'Projection with {self.num_processes} processes:',
+            f'  Runtime:  {_format_duration(self.seconds)}',
+            f'  RAM:      {_format_bytes(self.memory)} ({_format_bytes(self.worker_memory)} per process, {_format_bytes(self.parent_memory)} for results)'
+            + (f' of {_format_bytes(self.available_memory)} {"available" if self.reliable_memory else "free"}' if self.available_memory is not None else ''),
+            f'  Output:   {self._output_line()}',
+        ]
+        if not self.fits:
+            lines += [f'Warning: the projected RAM exceeds the available memory by {_format_bytes(self.memory - self.available_memory)}'
+                      + (', even with a single process' if self.num_processes == 1 else '')
+                      + ('' if self.reliable_memory else ' (free memory only, without the reclaimable page cache)')]
+        return '\n'.join(lines)
+
+    def _cost_lines(self) -> list:
+        raise NotImplementedError
+
+    def _output_line(self) -> str:
+        raise NotImplementedError
+
+
+class Preflight(PreflightBase):
+    # Preflight of distance runs: samples every engine per distance type,
+    # selects the fastest, and projects the distances the parent collects.
+
+    def __init__(self, hypergraph: TimeVaryingHypergraph, engines=None, num_processes=None, sample_size=5, cutoffs=None, seed=0):
+        self.sampled_engines = engines or tuple(ENGINES)
+        self.cutoffs = cutoffs
+        super().__init__(hypergraph, num_processes=num_processes, sample_size=sample_size, seed=seed)
+
+    def _sample(self, hypergraph: TimeVaryingHypergraph, sources):
+        self.costs = sample_costs(hypergraph, sources, self.sampled_engines, DistanceType, self.cutoffs) if sources else {}
+        self.engines = {distance_type: self._fastest_engine(distance_type, self.sampled_engines) for distance_type in DistanceType}
+
+        self.rows = max((self._best(distance_type)['reached_per_source'] for distance_type in DistanceType), default=0) * self.num_sources
+        code_size = np.min_scalar_type(max(self.num_sources - 1, 0)).itemsize
+        self.row_size = 2 * code_size + len(DistanceType) * BYTES_PER_DISTANCE
+        reached = sum(self._best(distance_type)['reached_per_source'] for distance_type in DistanceType) * self.num_sources
+        held = len(DistanceType) * self.num_sources * BYTES_PER_SOURCE_RESULT + reached * (code_size + BYTES_PER_DISTANCE)
+        self.parent_memory = held + self.rows * (self.row_size + 2 * code_size)
+        self.output_size = self._output_size()
+        self.seconds_per_source = sum(self._best(distance_type)['seconds_per_source'] for distance_type in DistanceType)
+
+    def _fastest_engine(self, distance_type: DistanceType, engines):
+        engines = [engine for engine in engines if supports(engine, distance_type)] or ['hyperedges']
+        return min(engines, key=lambda engine: self.costs.get((distance_type, engine), {}).get('seconds_per_source', 0))
+
+    def _best(self, distance_type: DistanceType) -> dict:
+        return self.costs.get((distance_type, self.engines[distance_type]), {'seconds_per_source': 0, 'reached_per_source': 0, 'results': {}})
+
+    def _output_size(self) -> dict:
+        # Extrapolate the compressed sizes from the CSV rows of the sampled sources.
+        results = [self._best(distance_type)['results'] for distance_type in DistanceType]
+        rows = []
+        for source in results[0]:
+            targets = sorted(set().union(*(result[source] for result in results)))
+            rows += [','.join([source, target] + [str(result[source].get(target, '')) for result in results]) for target in targets]
+        if not rows:
+            return {'csv': 0, 'pickle': 0}
+        text = '\n'.join(rows).encode('utf-8')
+        ratio = len(bz2.compress(text)) / len(text)
+        return {
+            'csv': len(text) / len(rows) * self.rows * ratio,
+            'pickle': self.rows * self.row_size * ratio,
+        }
+
+    def _cost_lines(self) -> list:
+        lines = []
+        for (distance_type, engine), cost in sorted(self.costs.items(), key=lambda item: (item[0][0].value, item[0][1])):
+            chosen = ' (selected)' if self.engines[distance_type] == engine else ''
+            lines += [f'  {distance_type.name.lower():<8} via {engine:<15}: {cost["seconds_per_source"]:.3f} s/source, {cost["reached_per_source"]:.0f} reached/source{chosen}']
+        return lines
+
+    def _output_line(self) -> str:
+        return f'{_format_bytes(self.output_size["csv"])} CSV, {_format_bytes(self.output_size["pickle"])} pickle'
+
+
+class ReachPreflight(PreflightBase):
+    # Preflight of --reach-only runs: samples the earliest-arrival reach
+    # search instead of the distance engines, and projects the reach counts
+    # (and bitsets) that the parent holds instead of distance rows.
+
+    def __init__(self, hypergraph: TimeVaryingHypergraph, num_processes=None, sample_size=5, latest=None, bitsets=False, seed=0):
+        self.latest = latest
+        self.bitsets = bitsets
+        super().__init__(hypergraph, num_processes=num_processes, sample_size=sample_size, seed=seed)
+
+    def _sample(self, hypergraph: TimeVaryingHypergraph, sources):
+        self.reach_cost = self._sample_reach(hypergraph, sources, self.latest)
+        bitset_bytes = self.num_sources * ((self.num_sources + 7) // 8) if self.bitsets else 0
+        self.parent_memory = self.num_sources * BYTES_PER_REACH_COUNT + bitset_bytes
+        # Upper bound: the participant names (fixed-width UTF-32), counts, and bitsets before compression
+        name_length = max((len(str(vertex)) for vertex in hypergraph.vertices()), default=0)
+        self.output_size = {'npz': self.num_sources * name_length * 4 + self.parent_memory}
+        self.seconds_per_source = self.reach_cost['seconds_per_source']
+
+    @staticmethod
+    def _sample_reach(hypergraph: TimeVaryingHypergraph, sources, latest) -> dict:
+        if not sources:
+            return {'seconds_per_source': 0, 'reached_per_source': 0}
+        index = incidence_index(hypergraph)
+        seconds, reached = 0.0, 0
+        for source in sources:
+            start = timer()
+            reached += len(reachable_vertices(hypergraph, source, latest=latest, index=index))
+            seconds += timer() - start
+        return {'seconds_per_source': seconds / len(sources), 'reached_per_source': reached / len(sources)}
+
+    def _cost_lines(self) -> list:
+        cost = self.reach_cost
+        return [f'  reach    via earliest arrival: {cost["seconds_per_source"]:.3f} s/source, {cost["reached_per_source"]:.0f} reached/source']
+
+    def _output_line(self) -> str:
+        return f'at most {_format_bytes(self.output_size["npz"])} npz'
+
+
+def _format_distribution(values: dict) -> str:
+    return ', '.join(f'{key} {value:,.1f}' if isinstance(value, float) else f'{key} {value:,}' for key, value in values.items())
+
+
+def _format_duration(seconds) -> str:
+    return str(timedelta(seconds=round(seconds)))
+
+
+def _format_bytes(size) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024:
+            return f'{size:.1f} {unit}'
+        size /= 1024
+    return f'{size:.1f} TB'
@@ -0,0 +1,103 @@
+import heapq
+from bisect import bisect_right
+
+import numpy as np
+
+from .model import TimeVaryingHypergraph
+from .minimal_paths import COUNTERS, time_sorted_incidence
+
+
+def incidence_index(hypergraph: TimeVaryingHypergraph):
+    # Hyperedges of each vertex sorted by timing, and the vertices of each hyperedge
+    vertex_hedges = time_sorted_incidence(hypergraph)
+    hedge_vertices = {hedge: tuple(hypergraph.vertices(hedge)) for hedge in hypergraph.hyperedges()}
+    return vertex_hedges, hedge_vertices
+
+
+def reachable_vertices(hypergraph: TimeVaryingHypergraph, source_vertex, latest=None, index=None) -> set:
+    # Earliest-arrival search: vertices are settled in order of their
+    # earliest arrival, so each hyperedge is reached first from the vertex
+    # that arrives earliest and never needs to be expanded again. Only
+    # hyperedges later than the arrival (and not later than latest) are
+    # expanded, found by bisecting the time-sorted hyperedges of a vertex.
+    # Reaches the same vertices as the foremost distances with cutoff latest.
+    hypergraph.hyperedges(source_vertex)  # raises EntityNotFound for an unknown source
+    vertex_hedges, hedge_vertices = index or incidence_index(hypergraph)
+    arrivals: dict = {}
+    expanded: set = set()
+    relaxations = 0
+
+    # Entries are (0, None, source) or (1, arrival, vertex): the source comes
+    # first and may start at any of its hyperedges.
+    queue: list = [(0, None, source_vertex)]
+    while queue:
+        _, arrival, vertex = heapq.heappop(queue)
+        if arrival is not None and arrivals[vertex] != arrival:  # stale
+            continue
+        timings, hedges = vertex_hedges[vertex]
+        for i in range(0 if arrival is None else bisect_right(timings, arrival), len(hedges)):
+            next_hedge_timing = timings[i]
+            if latest is not None and next_hedge_timing > latest:
+                break
+            next_hedge = hedges[i]
+            if next_hedge in expanded:
+                continue
+            expanded.add(next_hedge)
+            for next_vertex in hedge_vertices[next_hedge]:
+                if next_vertex != source_vertex and (next_vertex not in arrivals or next_hedge_timing < arrivals[next_vertex]):
+                    arrivals[next_vertex] = next_hedge_timing
+                    heapq.heappush(queue, (1, next_hedge_timing, next_vertex))
+                    relaxations += 1
+    COUNTERS['relaxations'] += relaxations
+    return set(arrivals)
+
+
+class ReachSets:
+    # Collects the number and, with bitsets, the set of reachable participants
+    # per source. Row and bit i of the bitsets belong to the i-th participant.
+
+    def __init__(self, participants, bitsets=False):
+        self.participants = tuple(participants)
+        self._codes = {participant: code for code, participant in enumerate(self.participants)}
+        self.reach_counts = np.zeros(len(self.participants), dtype=np.uint32)
+        self.reachable = np.zeros((len(self.participants), (len(self.participants) + 7) // 8), dtype=np.uint8) if bitsets else None
+        self._rows = 0
+
+    def __len__(self):
+        return self._rows
+
+    @property
+    def nbytes(self):
+        return self.reach_counts.nbytes + (self.reachable.nbytes if self.reachable is not None else 0)
+
+    def add(self, source, reachable):
+        code = self._codes[source]
+        self.reach_counts[code] = len(reachable)
+        if self.reachable is not None:
+            row = np.zeros(len(self.participants), dtype=bool)
+            row[np.fromiter((self._codes[target] for target in reachable), dtype=np.intp, count=len(reachable))] = True
+            self.reachable[code] = np.packbits(row)
+        self._rows += len(reachable)
+
+    def save(self, path):
+        arrays = {'participants': np.array([str(participant) for participant in self.participants]), 'reach_counts': self.reach_counts}
+        if self.reachable is not None:
+            arrays['reachable'] = self.reachable
+        with open(path, 'wb') as file:
+            np.savez_compressed(file, **arrays)
+
+
+def load_reach(path) -> dict:
+    # Returns the arrays written by ReachSets.save: participants, reach_counts, and, if written, reachable
+    with np.load(path, allow_pickle=False) as arrays:
+        return {key: arrays[key] for key in arrays.files}
+
+
+def reachable_participants(reach: dict, source) -> set:
+    participants = reach['participants']
+    codes = np.flatnonzero(participants == str(source))
+    if codes.size == 0:
+        raise KeyError(source)
+    code = codes[0]
+    row = np.unpackbits(reach['reachable'][code], count=len(participants)).astype(bool)
+    return set(participants[row].tolist())
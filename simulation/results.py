@@ -0,0 +1,124 @@
+import shutil
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# A result in columns is a directory <name>.columns with one .npy file per
+# distance column, the target codes of all rows, and the offsets of the rows
+# of each source (rows are sorted by source and target). The arrays are
+# memory-mapped, so loading a column only reads that column, and loading a
+# few sources only reads their rows.
+COLUMNS_SUFFIX = '.columns'
+
+
+def write_columns(result: pd.DataFrame, directory):
+    # Written next to the directory and renamed at the end, so an interrupted write leaves no incomplete result
+    directory = Path(directory)
+    partial = directory.with_name(directory.name + '.partial')
+    shutil.rmtree(partial, ignore_errors=True)
+    partial.mkdir(parents=True)
+    _write_columns(result, partial)
+    shutil.rmtree(directory, ignore_errors=True)
+    partial.rename(directory)
+
+
+def _write_columns(result: pd.DataFrame, directory: Path):
+    participants = result.index.levels[0]
+    source_codes, target_codes = (np.asarray(codes) for codes in result.index.codes)
+    order = None
+    if len(source_codes) and (np.any(np.diff(source_codes) < 0) or np.any((np.diff(source_codes) == 0) & (np.diff(target_codes) < 0))):
+        order = np.lexsort((target_codes, source_codes))
+        source_codes, target_codes = source_codes[order], target_codes[order]
+
+    np.save(directory/'participants.npy', np.array([str(participant) for participant in participants]))
+    np.save(directory/'columns.npy', np.array([str(column) for column in result.columns]))
+    np.save(directory/'source_offsets.npy', np.searchsorted(source_codes, np.arange(len(participants) + 1)).astype(np.int64))
+    np.save(directory/'target_codes.npy', target_codes.astype(np.min_scalar_type(max(len(participants) - 1, 0))))
+    for column in result.columns:
+        values = result[column].to_numpy()
+        np.save(directory/f'{column}.npy', values if order is None else values[order])
+
+
+class DistanceResults:
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        if not self.directory.is_dir():
+            raise FileNotFoundError(f'No results in columns at {self.directory}')
+        self.participants = tuple(np.load(self.directory/'participants.npy').tolist())
+        self.columns = tuple(np.load(self.directory/'columns.npy').tolist())
+        self.category = pd.api.types.CategoricalDtype(categories=self.participants, ordered=False)
+        self._codes = {participant: code for code, participant in enumerate(self.participants)}
+        self._offsets = np.load(self.directory/'source_offsets.npy')
+        self._arrays: dict = {}
+
+    def __len__(self):
+        return int(self._offsets[-1])
+
+    def _array(self, name):
+        if name not in self._arrays:
+            self._arrays[name] = np.load(self.directory/f'{name}.npy', mmap_mode='r')
+        return self._arrays[name]
+
+    def _rows(self, sources):
+        # Source codes and row numbers of the sources in order of the participants (all rows if sources is None)
+        if sources is None:
+            source_codes = np.arange(len(self.participants))
+            return source_codes, slice(None)
+        source_codes = np.array(sorted({self._codes[source] for source in sources}), dtype=np.intp)
+        starts, ends = self._offsets[source_codes], self._offsets[source_codes + 1]
+        rows = np.concatenate([np.arange(start, end) for start, end in zip(starts, ends)]) if len(source_codes) else np.empty(0, dtype=np.intp)
+        return source_codes, rows
+
+    def index(self, sources=None) -> pd.MultiIndex:
+        source_codes, rows = self._rows(sources)
+        counts = np.diff(self._offsets)[source_codes]
+        code_type = np.min_scalar_type(max(len(self.participants) - 1, 0))
+        levels = [pd.CategoricalIndex(self.participants, dtype=self.category, name=name) for name in ('source', 'target')]
+        codes = [np.repeat(source_codes.astype(code_type), counts), np.asarray(self._array('target_codes')[rows])]
+        return pd.MultiIndex(levels=levels, codes=codes, names=['source', 'target'], verify_integrity=False)
+
+    def column(self, name, sources=None) -> pd.Series:
+        if name not in self.columns:
+            raise KeyError(name)
+        _, rows = self._rows(sources)
+        return pd.Series(np.array(self._array(name)[rows]), index=self.index(sources), name=name)
+
+    def frame(self, columns=None, sources=None) -> pd.DataFrame:
+        columns = self.columns if columns is None else tuple(columns)
+        for name in columns:
+            if name not in self.columns:
+                raise KeyError(name)
+        _, rows = self._rows(sources)
+        return pd.DataFrame({name: np.array(self._array(name)[rows]) for name in columns}, index=self.index(sources), copy=False)
+
+
+def convert(pickle_path, directory=None) -> Path:
+    # Writes the columns of a <name>.pickle.bz2 result to <name>.columns next to it
+    pickle_path = Path(pickle_path)
+    if directory is None:
+        directory = pickle_path.with_name(pickle_path.name.split('.')[0] + COLUMNS_SUFFIX)
+    write_columns(pd.read_pickle(pickle_path), directory)
+    return Path(directory)
+
+
+def open_results(path) -> DistanceResults:
+    # Opens <path>.columns, converted once from <path>.pickle.bz2 if needed
+    directory = Path(f'{path}{COLUMNS_SUFFIX}')
+    if not directory.is_dir():
+        convert(f'{path}.pickle.bz2', directory)
+    return DistanceResults(directory)
+
+
+def run_convert():
+    parser = argparse.ArgumentParser(description='Convert simulation results to columns that can be loaded lazily')
+    parser.add_argument('paths', type=str, nargs='+', help='The <name>.pickle.bz2 results to convert')
+    args = parser.parse_args()
+    for path in args.paths:
+        print(f'Converted {path} to {convert(path)}')
+
+
+if __name__ == '__main__':
+    run_convert()
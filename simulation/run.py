@@ -1,66 +1,157 @@
 import argparse
-from pathlib import Path
 import multiprocessing as mp
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
-import pandas as pd
 from tqdm import tqdm
 
 from .model import CommunicationNetwork
-from .minimal_paths import single_source_dijkstra_hyperedges, single_source_dijkstra_vertices, DistanceType
+from .minimal_paths import DistanceType
+from .all_pairs import all_pairs_distances_by_type, all_pairs_reachable
+from .frames import DistanceFrameBuilder
+from .preflight import Preflight, ReachPreflight
+from .output import write_results, COMPRESSIONS
+from .telemetry import Telemetry
+from .reach import ReachSets
+from .results import write_columns, COLUMNS_SUFFIX
 
 AVAILABLE_DATA_SETS = ('microsoft', )  # other data sets have not been published yet
 
 
+def _load(name, engines, num_processes, sample_size, cutoffs, compact=False, reach_only=False, reach_bitsets=False):
+    communication_network = CommunicationNetwork.from_json(f'./data/networks/{name}.json.bz2', name=name, compact=compact)
+    if reach_only:
+        preflight = ReachPreflight(communication_network, num_processes=num_processes, sample_size=sample_size,
+                                   latest=cutoffs[DistanceType.FOREMOST], bitsets=reach_bitsets)
+    else:
+        preflight = Preflight(communication_network, engines=engines, num_processes=num_processes, sample_size=sample_size, cutoffs=cutoffs)
+    return communication_network, preflight
+
+
+def _write(name, min_distances: DistanceFrameBuilder, result_dir_path: Path, compression, columns):
+    result = min_distances.build()
+    result.info(verbose=True, memory_usage=True, show_counts=True)
+    write_results(result, result_dir_path/name, compression=compression)
+    if columns:
+        write_columns(result, result_dir_path/f'{name}{COLUMNS_SUFFIX}')
+
+
 def run_simulation():
     parser = argparse.ArgumentParser(description='Simulating information diffusion in code review communication networks')
     parser.add_argument('--select', type=str, nargs='+', choices=AVAILABLE_DATA_SETS, help='Load a subset of the available data', default=AVAILABLE_DATA_SETS)
-    parser.add_argument('--num_processes', type=int, default=mp.cpu_count(), help='Number of parallel processes (default # of CPUs)')
+    parser.add_argument('--num_processes', type=int, default=None, help='Number of parallel processes (default # of CPUs, limited by the available memory)')
 
     group = parser.add_mutually_exclusive_group()
-    group.add_argument('--hyperedge_dijkstra', action='store_false', help='Use single-source Dikstra algorithm via hyperedges; tend to be faster than --vertex_dijkstra (default)')
-    group.add_argument('--vertex_dijkstra', action='store_true', help='Use single-source Dikstra algorithm via vertices')
+    group.add_argument('--hyperedge_dijkstra', dest='engine', action='store_const', const='hyperedges', help='Use single-source Dikstra algorithm via hyperedges')
+    group.add_argument('--vertex_dijkstra', dest='engine', action='store_const', const='vertices', help='Use single-source Dikstra algorithm via vertices, pruning dominated arrivals')
+
+    parser.add_argument('--preflight_samples', type=int, default=5, help='Number of sampled sources to estimate the runtime and select the fastest algorithm (default 5)')
+    parser.add_argument('--compact', action='store_true', help='Drop channels that cannot change any minimal distance (with at most one participant or duplicates of another channel) before the simulation')
+    parser.add_argument('--dry_run', '--dry-run', action='store_true', help='Only print the network statistics and projected runtime, RAM, and output size')
+    parser.add_argument('--ignore_memory', '--ignore-memory', action='store_true', help='Start the simulation even if the projected RAM exceeds the available memory')
+
+    parser.add_argument('--max_hops', type=int, default=None, help='Do not search beyond this number of hops for shortest distances')
+    parser.add_argument('--max_days', type=float, default=None, help='Do not search beyond this duration in days for fastest distances')
+    parser.add_argument('--latest', type=datetime.fromisoformat, default=None, help='Do not search beyond this ISO timestamp for foremost distances')
+
+    parser.add_argument('--compression', type=str, choices=tuple(COMPRESSIONS), default='bz2',
+                        help='Compression of the results: bz2 (default) writes the canonical files of the verification hashes, bz2-parallel compresses blocks on all cores, zstd and lz4 require the optional libraries zstandard and lz4')
+
+    parser.add_argument('--columns', action='store_true', help='Also write the results uncompressed to <name>.columns, which simulation.results loads lazily per column and source')
+    parser.add_argument('--reach_only', '--reach-only', action='store_true', help='Only compute the number of reachable participants per source (within --latest) and write them to <name>.reach.npz')
+    parser.add_argument('--reach_bitsets', action='store_true', help='With --reach-only, also write the set of reachable participants per source as bitsets')
+
+    parser.add_argument('--telemetry', type=str, default=None, help='Append throughput, ETA, memory, and the slowest in-flight sources as JSON lines to this file (summarize via python3 -m simulation.telemetry <file>)')
+    parser.add_argument('--telemetry_interval', type=float, default=60, help='Seconds between two telemetry records (default 60)')
 
     args = parser.parse_args()
+    if not COMPRESSIONS[args.compression].available:
+        parser.error(f'--compression {args.compression} requires an optional library that is not installed')
+
+    cutoffs = {
+        DistanceType.SHORTEST: args.max_hops,
+        DistanceType.FASTEST: timedelta(days=args.max_days) if args.max_days is not None else None,
+        DistanceType.FOREMOST: args.latest,
+    }
 
     result_dir_path = Path('./data/minimal_paths/')
     result_dir_path.mkdir(parents=True, exist_ok=True)
 
-    if args.hyperedge_dijkstra:
-        single_source_dijkstra = single_source_dijkstra_hyperedges
-    else:
-        single_source_dijkstra = single_source_dijkstra_vertices
-
-    for name in args.select:
-        communication_network = CommunicationNetwork.from_json(f'./data/networks/{name}.json.bz2', name=name)
-
-        participants = tuple(sorted(communication_network.participants()))
-        category = pd.api.types.CategoricalDtype(categories=participants, ordered=False)
-        data_frames = []
-        for distance_type in DistanceType:
-            distance_type_name = distance_type.name.lower()
-            min_distances = []
-            with ProcessPoolExecutor(mp_context=mp.get_context('spawn'), max_workers=9) as executor:
-                futures = {executor.submit(
-                    single_source_dijkstra, communication_network, p, distance_type): p for p in participants}
-                for future in tqdm(as_completed(futures), total=len(futures), desc=f'Find all {distance_type_name} distances at {name.capitalize()}'.ljust(36)):
-                    source = futures[future]
-                    if future.exception():
-                        raise future.exception()
-                    for target, distance in future.result().items():
-                        min_distances += [(source, target, distance)]
-            min_distances_df = pd.DataFrame(
-                min_distances, columns=['source', 'target', 'distance'])
-            min_distances = None
-            min_distances_df.source = min_distances_df.source.astype(
-                category)
-            min_distances_df.target = min_distances_df.target.astype(
-                category)
-            data_frames += [min_distances_df.set_index(['source', 'target']).distance.rename(distance_type_name).sort_index()]
-        result = pd.concat(data_frames, axis=1).sort_index()
-        result.info(verbose=True, memory_usage=True, show_counts=True)
-        result.to_csv(result_dir_path/f'{name}.csv.bz2', compression='bz2')
-        result.to_pickle(result_dir_path/f'{name}.pickle.bz2', compression='bz2')
+    # Pipeline: while the workers compute the distances of a network, a
+    # loader thread loads the next network and runs its preflight, and a
+    # writer thread builds and writes the results of the previous network.
+    # One pool of worker processes computes all networks and distance types.
+    engines = (args.engine, ) if args.engine else None
+    executor, num_workers, worker_memory, writing = None, 0, 0, None
+    telemetry = Telemetry(args.telemetry, interval=args.telemetry_interval) if args.telemetry else None
+    with ThreadPoolExecutor(max_workers=1) as loader, ThreadPoolExecutor(max_workers=1) as writer:
+        try:
+            loading = loader.submit(_load, args.select[0], engines, args.num_processes, args.preflight_samples, cutoffs,
+                                    args.compact, args.reach_only, args.reach_bitsets)
+            for i, name in enumerate(args.select):
+                communication_network, preflight = loading.result()
+                if executor is not None:
+                    # The preflight measured the available memory while the workers held the previous network, which they release for this one
+                    preflight.plan(args.num_processes, reusable_memory=num_workers * worker_memory)
+                if i + 1 < len(args.select):
+                    loading = loader.submit(_load, args.select[i + 1], engines, args.num_processes, args.preflight_samples, cutoffs,
+                                            args.compact, args.reach_only, args.reach_bitsets)
+                print(f'Preflight for {name.capitalize()}')
+                print(preflight.report())
+                if args.dry_run:
+                    continue
+                if not preflight.fits and preflight.reliable_memory and not args.ignore_memory:
+                    parser.error(f'{name.capitalize()} does not fit into the available memory (see the preflight above), use --ignore_memory to start anyway')
+
+                # Workers keep only the latest network, so a pool only needs to shrink if a network needs less memory per worker
+                if executor is None or preflight.num_processes < num_workers:
+                    if executor is not None:
+                        executor.shutdown()
+                    num_workers = preflight.num_processes
+                    executor = ProcessPoolExecutor(max_workers=num_workers, mp_context=mp.get_context('spawn'))
+                worker_memory = preflight.worker_memory
+
+                participants = tuple(sorted(communication_network.participants()))
+                if args.reach_only:
+                    reach = ReachSets(participants, bitsets=args.reach_bitsets)
+                    if telemetry is not None:
+                        telemetry.start(name, len(participants), reach)
+                    all_pairs = all_pairs_reachable(communication_network, sources=participants, latest=args.latest,
+                                                    num_processes=num_workers, executor=executor, telemetry=telemetry)
+                    for source, reachable in tqdm(all_pairs, total=len(participants), desc=f'Find all reachable at {name.capitalize()}'.ljust(36)):
+                        reach.add(source, reachable)
+                    communication_network = None
+                    if telemetry is not None:
+                        telemetry.finish()
+                    if writing is not None:
+                        writing.result()
+                    writing = writer.submit(reach.save, result_dir_path/f'{name}.reach.npz')
+                    reach = None
+                    continue
+
+                min_distances = DistanceFrameBuilder(participants)
+                if telemetry is not None:
+                    telemetry.start(name, len(DistanceType) * len(participants), min_distances)
+                all_pairs = all_pairs_distances_by_type(communication_network, DistanceType, sources=participants, engines=preflight.engines,
+                                                        cutoffs=cutoffs, num_processes=num_workers, executor=executor, telemetry=telemetry)
+                for distance_type, source, distances in tqdm(all_pairs, total=len(DistanceType) * len(participants), desc=f'Find all distances at {name.capitalize()}'.ljust(36)):
+                    min_distances.add(distance_type, source, distances)
+                communication_network = None
+                if telemetry is not None:
+                    telemetry.finish()
+
+                if writing is not None:
+                    writing.result()  # at most one result waits for the writer
+                writing = writer.submit(_write, name, min_distances, result_dir_path, args.compression, args.columns)
+                min_distances = None
+            if writing is not None:
+                writing.result()
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            if telemetry is not None:
+                telemetry.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,217 @@
+import argparse
+import json
+import threading
+import multiprocessing as mp
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, urlencode
+from urllib.request import urlopen
+from urllib.error import HTTPError
+
+from .model import CommunicationNetwork, EntityNotFound
+from .minimal_paths import single_source_dijkstra_hyperedges, single_pair_dijkstra_hyperedges, DistanceType
+from .run import AVAILABLE_DATA_SETS
+
+
+class LRUCache:
+    # Evicts least recently used entries by the total size of the cached values, not their number
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.size = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key, value, size: int = 1):
+        with self._lock:
+            if key in self._entries:
+                self.size -= self._entries.pop(key)[1]
+            if size > self.max_size:
+                return
+            self._entries[key] = (value, size)
+            self.size += size
+            while self.size > self.max_size:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+
+
+_network: CommunicationNetwork = None  # pylint: disable=invalid-name  # set per worker by _init_worker
+
+
+def _init_worker(network):
+    global _network  # pylint: disable=global-statement  # per-process state of the worker
+    _network = network
+
+
+def _single_source(source, distance_type, cutoff):
+    return single_source_dijkstra_hyperedges(_network, source, distance_type, cutoff=cutoff)
+
+
+def _single_pair(source, target, distance_type, cutoff):
+    return single_pair_dijkstra_hyperedges(_network, source, target, distance_type, cutoff=cutoff)
+
+
+class DistanceService:
+    def __init__(self, network: CommunicationNetwork, max_workers=None, cache_size=10_000_000):
+        self.network = network
+        self.cache = LRUCache(cache_size)
+        self._executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=mp.get_context('spawn'),
+                                             initializer=_init_worker, initargs=(network,))
+
+    def close(self):
+        self._executor.shutdown(cancel_futures=True)
+
+    def single_source(self, source, distance_type: DistanceType, cutoff=None) -> dict:
+        self.network.hyperedges(source)  # raises EntityNotFound before a worker is busy with it
+        key = (source, distance_type, cutoff)
+        distances = self.cache.get(key)
+        if distances is None:
+            distances = self._executor.submit(_single_source, source, distance_type, cutoff).result()
+            self.cache.put(key, distances, size=len(distances) + 1)
+        return distances
+
+    def single_pair(self, source, target, distance_type: DistanceType, cutoff=None):
+        self.network.hyperedges(source)
+        self.network.hyperedges(target)
+        distances = self.cache.get((source, distance_type, cutoff))
+        if distances is not None:
+            return distances.get(target)
+        return self._executor.submit(_single_pair, source, target, distance_type, cutoff).result()
+
+    def reach_count(self, source) -> int:
+        # Without a cutoff, the reachable participants do not depend on the distance type.
+        for distance_type in DistanceType:
+            distances = self.cache.get((source, distance_type, None))
+            if distances is not None:
+                return len(distances)
+        return len(self.single_source(source, DistanceType.FOREMOST))
+
+
+def _encode(distance):
+    if isinstance(distance, timedelta):
+        return distance.total_seconds()
+    if isinstance(distance, datetime):
+        return distance.isoformat()
+    return distance
+
+
+def _decode(distance, distance_type: DistanceType):
+    if distance is None:
+        return None
+    match distance_type:
+        case DistanceType.SHORTEST:
+            return int(distance)
+        case DistanceType.FASTEST:
+            return timedelta(seconds=float(distance))
+        case DistanceType.FOREMOST:
+            return datetime.fromisoformat(distance)
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    service: DistanceService = None
+
+    def do_GET(self):  # pylint: disable=invalid-name  # named by BaseHTTPRequestHandler
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            distance_type = DistanceType[query.get('distance_type', 'foremost').upper()]
+            cutoff = _decode(query.get('cutoff'), distance_type)
+            match url.path:
+                case '/single_source':
+                    distances = self.service.single_source(query['source'], distance_type, cutoff)
+                    body = {target: _encode(distance) for target, distance in distances.items()}
+                case '/single_pair':
+                    body = _encode(self.service.single_pair(query['source'], query['target'], distance_type, cutoff))
+                case '/reach_count':
+                    body = self.service.reach_count(query['source'])
+                case _:
+                    return self._respond(404, {'error': f'Unknown query {url.path}'})
+        except EntityNotFound as e:
+            return self._respond(404, {'error': str(e)})
+        except (KeyError, ValueError) as e:
+            return self._respond(400, {'error': f'Invalid query: {e}'})
+        self._respond(200, body)
+
+    def _respond(self, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+def serve(service: DistanceService, host='127.0.0.1', port=0) -> ThreadingHTTPServer:
+    handler = type('RequestHandler', (_RequestHandler, ), {'service': service})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+class ServiceClient:
+    def __init__(self, url: str):
+        self.url = url.rstrip('/')
+
+    def _get(self, path, **params):
+        params = {key: value for key, value in params.items() if value is not None}
+        try:
+            with urlopen(f'{self.url}{path}?{urlencode(params)}') as response:
+                return json.loads(response.read())
+        except HTTPError as e:
+            message = json.loads(e.read())['error']
+            if e.code == 404:
+                raise EntityNotFound(message) from None
+            raise ValueError(message) from None
+
+    def single_source(self, source, distance_type: DistanceType, cutoff=None) -> dict:
+        distances = self._get('/single_source', source=source, distance_type=distance_type.name.lower(), cutoff=_encode(cutoff))
+        return {target: _decode(distance, distance_type) for target, distance in distances.items()}
+
+    def single_pair(self, source, target, distance_type: DistanceType, cutoff=None):
+        distance = self._get('/single_pair', source=source, target=target, distance_type=distance_type.name.lower(), cutoff=_encode(cutoff))
+        return _decode(distance, distance_type)
+
+    def reach_count(self, source) -> int:
+        return self._get('/reach_count', source=source)
+
+
+def run_service():
+    parser = argparse.ArgumentParser(description='Serve minimal distance queries on a code review communication network')
+    parser.add_argument('--select', type=str, choices=AVAILABLE_DATA_SETS, help='The network to load', default=AVAILABLE_DATA_SETS[0])
+    parser.add_argument('--port', type=int, default=8765, help='Port on localhost to listen on (default 8765)')
+    parser.add_argument('--num_processes', type=int, default=mp.cpu_count(), help='Number of parallel processes (default # of CPUs)')
+    parser.add_argument('--cache_size', type=int, default=10_000_000, help='Maximum number of cached distances (default 10,000,000)')
+
+    args = parser.parse_args()
+
+    communication_network = CommunicationNetwork.from_json(f'./data/networks/{args.select}.json.bz2', name=args.select)
+    service = DistanceService(communication_network, max_workers=args.num_processes, cache_size=args.cache_size)
+    server = serve(service, port=args.port)
+    print(f'Serving {args.select} at http://127.0.0.1:{server.server_address[1]}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == '__main__':
+    run_service()
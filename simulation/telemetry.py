@@ -0,0 +1,176 @@
+import json
+import argparse
+import threading
+from datetime import datetime, timedelta
+from timeit import default_timer as timer
+
+from .preflight import resident_memory, _format_bytes, _format_duration
+
+# Number of in-flight sources reported as stragglers
+SLOWEST_IN_FLIGHT = 5
+# Seconds between two checks which submitted tasks have started running
+POLL_INTERVAL = 1.0
+
+
+class Telemetry:
+    # Writes one JSON object per line to path every interval seconds while a
+    # network is computed, and once when it is done. Tasks are those of
+    # all_pairs, which tell their source and kind (distance type or reach).
+
+    def __init__(self, path, interval=60.0):
+        self.path = path
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._file = open(path, 'a', encoding='utf-8')  # pylint: disable=consider-using-with  # appended to for the whole run until close()
+        self._network = None
+        self._thread = threading.Thread(target=self._run, name='telemetry', daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self._file.close()
+
+    def _run(self):
+        next_emit = timer() + self.interval
+        while not self._stop.wait(min(POLL_INTERVAL, max(next_emit - timer(), 0))):
+            self._poll()
+            if timer() >= next_emit:
+                self.emit()
+                next_emit += self.interval
+
+    def _poll(self):
+        # A task is in flight from when its future runs, not from when it
+        # was submitted: all_pairs submits tasks ahead, which wait in the
+        # queue of the executor. A ProcessPoolExecutor runs the future when it
+        # hands the task to a worker (at most one more than the workers).
+        with self._lock:
+            network = self._network
+            if network is None:
+                return
+            now = timer()
+            for task, future in network['submitted'].items():
+                if task not in network['in_flight'] and future.running():
+                    network['in_flight'][task] = now
+
+    def start(self, name, total, min_distances=None):
+        # min_distances: the collected results in the parent, anything with len() and nbytes
+        with self._lock:
+            now = timer()
+            self._network = {
+                'name': name,
+                'total': total,
+                'min_distances': min_distances,
+                'started': now,
+                'completed': 0,
+                'relaxations': 0,
+                'workers': {},
+                'submitted': {},  # task -> future
+                'in_flight': {},  # task -> time the task was first seen running
+                'last': (now, 0, 0),  # time, completed, and relaxations of the last record
+            }
+
+    def submitted(self, task, future):
+        with self._lock:
+            if self._network is not None:
+                self._network['submitted'][task] = future
+
+    def completed(self, task, stats: dict):
+        with self._lock:
+            network = self._network
+            if network is None:
+                return
+            network['submitted'].pop(task, None)
+            network['in_flight'].pop(task, None)
+            network['completed'] += 1
+            network['relaxations'] += stats['relaxations']
+            network['workers'][stats['pid']] = stats['rss']
+
+    def finish(self):
+        self.emit(done=True)
+        with self._lock:
+            self._network = None
+
+    def emit(self, done=False):
+        self._poll()
+        with self._lock:
+            network = self._network
+            if network is None:
+                return
+            record = self._record(network, timer(), done)
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+
+    def _record(self, network, now, done) -> dict:
+        last_time, last_completed, last_relaxations = network['last']
+        network['last'] = (now, network['completed'], network['relaxations'])
+        elapsed = now - network['started']
+        interval = max(now - last_time, 1e-9)
+        remaining = network['total'] - network['completed']
+        # Projected from the average rate since the network started, which is less noisy than the last interval
+        eta = remaining * elapsed / network['completed'] if network['completed'] else None
+        slowest = sorted(network['in_flight'].items(), key=lambda item: item[1])[:SLOWEST_IN_FLIGHT]
+        min_distances = network['min_distances']
+        return {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'network': network['name'],
+            'done': done,
+            'elapsed': round(elapsed, 3),
+            'completed': network['completed'],
+            'total': network['total'],
+            'sources_per_second': (network['completed'] - last_completed) / interval,
+            'relaxations_per_second': (network['relaxations'] - last_relaxations) / interval,
+            'worker_rss': {str(pid): rss for pid, rss in network['workers'].items()},
+            'parent_rss': resident_memory(),
+            'parent_rows': len(min_distances) if min_distances is not None else None,
+            'parent_bytes': min_distances.nbytes if min_distances is not None else None,
+            'slowest_in_flight': [{'kind': task.kind, 'source': task.source, 'seconds': round(now - started, 3)} for task, started in slowest],
+            'eta': round(eta, 3) if eta is not None else None,
+            'projected_completion': (datetime.now() + timedelta(seconds=eta)).isoformat(timespec='seconds') if eta is not None else None,
+        }
+
+
+def read_records(path) -> list:
+    with open(path, encoding='utf-8') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def summarize(records) -> str:
+    lines = []
+    networks: dict = {}
+    for record in records:
+        networks.setdefault(record['network'], []).append(record)
+    for name, network_records in networks.items():
+        last = network_records[-1]
+        worker_rss = [rss for record in network_records for rss in record['worker_rss'].values() if rss is not None]
+        parent_bytes = [record['parent_bytes'] for record in network_records if record['parent_bytes'] is not None]
+        slowest = max((straggler for record in network_records for straggler in record['slowest_in_flight']), key=lambda straggler: straggler['seconds'], default=None)
+        status = 'done' if last['done'] else f'running, {_format_duration(last["eta"])} remaining (at {last["projected_completion"]})' if last['eta'] is not None else 'running'
+        lines += [
+            f'{name}: {last["completed"]:,} of {last["total"]:,} sources after {_format_duration(last["elapsed"])}, {status}, last record at {last["time"]}',
+            f'  Throughput:  {last["completed"] / last["elapsed"] if last["elapsed"] else 0:,.2f} sources/s overall, '
+            f'{last["sources_per_second"]:,.2f} sources/s and {last["relaxations_per_second"]:,.0f} relaxations/s recently',
+            f'  Memory:      {len(last["worker_rss"])} workers, max {_format_bytes(max(worker_rss, default=0))} per worker, '
+            f'max {_format_bytes(max(parent_bytes, default=0))} of collected results in the parent',
+        ]
+        if slowest is not None:
+            lines += [f'  Slowest:     {slowest["kind"]} search from {slowest["source"]} in flight for {_format_duration(slowest["seconds"])}']
+    return '\n'.join(lines)
+
+
+def run_summary():
+    parser = argparse.ArgumentParser(description='Summarize the telemetry of a simulation run')
+    parser.add_argument('path', type=str, help='The JSON-lines telemetry file written via --telemetry')
+    args = parser.parse_args()
+    print(summarize(read_records(args.path)))
+
+
+if __name__ == '__main__':
+    run_summary()
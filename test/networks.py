@@ -0,0 +1,41 @@
+import random
+from datetime import datetime, timedelta
+
+from simulation.model import CommunicationNetwork
+
+# Five participants in six channels over four days, in the format of the data sets
+RAW_NETWORK = {
+    'h1': {'participants': ['v1', 'v2'], 'end': '2023-05-01'},
+    'h2': {'participants': ['v1', 'v3'], 'end': '2023-05-01'},
+    'h3': {'participants': ['v2', 'v4'], 'end': '2023-05-02'},
+    'h4': {'participants': ['v3', 'v4'], 'end': '2023-05-03'},
+    'h5': {'participants': ['v4', 'v5'], 'end': '2023-05-02'},
+    'h6': {'participants': ['v1', 'v5'], 'end': '2023-05-04'},
+}
+
+
+def small_network():
+    # RAW_NETWORK as a communication network
+    return CommunicationNetwork({channel: raw['participants'] for channel, raw in RAW_NETWORK.items()},
+                                {channel: datetime.fromisoformat(raw['end']) for channel, raw in RAW_NETWORK.items()})
+
+
+def random_network(seed, num_participants=12, num_channels=30, min_size=1, max_size=4, max_timing=10,
+                   start=timedelta(0), unit=timedelta(days=1), duplicates=0.0):
+    # Random communication network whose channels have min_size to max_size
+    # participants and a timing of start plus 0 to max_timing units. Small
+    # max_timing values give many ties in timings. With probability
+    # duplicates, a channel repeats an earlier one (reversed, and a third of
+    # them one unit later).
+    rng = random.Random(seed)
+    participants = [f'v{i}' for i in range(num_participants)]
+    channels, timings = {}, {}
+    for i in range(num_channels):
+        if duplicates and channels and rng.random() < duplicates:
+            original = rng.choice(list(channels))
+            channels[f'h{i}'] = list(reversed(channels[original]))
+            timings[f'h{i}'] = timings[original] + rng.choice((0, 0, 1)) * unit
+        else:
+            channels[f'h{i}'] = rng.sample(participants, rng.randint(min_size, max_size))
+            timings[f'h{i}'] = start + rng.randint(0, max_timing) * unit
+    return CommunicationNetwork(channels, timings)
@@ -0,0 +1,84 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from simulation import all_pairs_distances, all_pairs_distances_by_type, all_pairs_distance_batches
+from simulation.minimal_paths import single_source_dijkstra_hyperedges, DistanceType
+
+from .networks import small_network
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.submitted = 0
+
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
+
+
+class TestAllPairs(unittest.TestCase):
+    def __init__(self, methodName=None):
+        super().__init__(methodName=methodName)
+        # Additional initialization
+        self.cn = small_network()
+
+    def test_all_pairs_distances(self):
+        """
+        Tests that the generator yields every source once with its single-source distances
+        """
+        for distance_type in DistanceType:
+            # Act
+            result = dict(all_pairs_distances(self.cn, distance_type, num_processes=2))
+
+            # Assert
+            expected = {source: single_source_dijkstra_hyperedges(self.cn, source, distance_type) for source in self.cn.participants()}
+            self.assertEqual(result, expected)
+
+    def test_all_pairs_distances_by_type(self):
+        """
+        Tests that one generator yields every source once per distance type, with the engine and cutoff of each type
+        """
+        engines = {DistanceType.SHORTEST: 'vertices', DistanceType.FOREMOST: 'hyperedges'}
+        cutoffs = {DistanceType.SHORTEST: 1}
+        result = {(distance_type, source): distances for distance_type, source, distances
+                  in all_pairs_distances_by_type(self.cn, DistanceType, engines=engines, cutoffs=cutoffs, num_processes=2)}
+
+        expected = {(distance_type, source): single_source_dijkstra_hyperedges(self.cn, source, distance_type, cutoff=cutoffs.get(distance_type))
+                    for distance_type in DistanceType for source in self.cn.participants()}
+        self.assertEqual(result, expected)
+
+    def test_backpressure(self):
+        """
+        Tests that no more than max_pending sources are submitted ahead of the consumer
+
+        -Consumes the first result and checks how many sources have been submitted
+        -Closes the generator early and checks that no further sources are submitted
+        """
+        with CountingExecutor(max_workers=2) as executor:
+            all_pairs = all_pairs_distances(self.cn, DistanceType.SHORTEST, max_pending=2, executor=executor)
+            next(all_pairs)
+            self.assertLessEqual(executor.submitted, 3)
+            all_pairs.close()
+            self.assertLessEqual(executor.submitted, 3)
+
+    def test_batches(self):
+        """
+        Tests that the columnar batches contain exactly the pairs of the generator
+        """
+        batches = list(all_pairs_distance_batches(self.cn, DistanceType.FOREMOST, batch_size=5, num_processes=2))
+
+        self.assertGreater(len(batches), 1)
+        rows = {(s, t): d for batch in batches for s, t, d in zip(batch['source'], batch['target'], batch['distance'])}
+        expected = {(source, target): distance for source in self.cn.participants()
+                    for target, distance in single_source_dijkstra_hyperedges(self.cn, source, DistanceType.FOREMOST).items()}
+        self.assertEqual(rows, expected)
+
+    def test_unknown_engine(self):
+        """
+        Tests that an unknown engine raises a ValueError
+        """
+        with self.assertRaises(ValueError):
+            next(all_pairs_distances(self.cn, DistanceType.SHORTEST, engine='bellman_ford'))
+        with self.assertRaises(ValueError):
+            next(all_pairs_distances(self.cn, DistanceType.SHORTEST, engine='fastest_profile'))
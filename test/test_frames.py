@@ -0,0 +1,98 @@
+import sys
+import random
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from simulation.frames import DistanceFrameBuilder
+from simulation.model import CommunicationNetwork
+from simulation.minimal_paths import single_source_dijkstra_hyperedges, DistanceType
+
+from .networks import random_network
+
+
+def sorted_frame(participants, results):
+    # The frame assembly by sorting the collected rows that DistanceFrameBuilder replaces
+    category = pd.api.types.CategoricalDtype(categories=participants, ordered=False)
+    data_frames = []
+    for distance_type, distances in results.items():
+        rows = [(source, target, distance) for source, targets in distances for target, distance in targets.items()]
+        data_frame = pd.DataFrame(rows, columns=['source', 'target', 'distance'])
+        data_frame.source = data_frame.source.astype(category)
+        data_frame.target = data_frame.target.astype(category)
+        data_frames += [data_frame.set_index(['source', 'target']).distance.rename(distance_type.name.lower()).sort_index()]
+    return pd.concat(data_frames, axis=1).sort_index()
+
+
+class TestDistanceFrameBuilder(unittest.TestCase):
+    def __init__(self, methodName=None):
+        super().__init__(methodName=methodName)
+        # Additional initialization
+        self.cn = random_network(7, num_participants=30, num_channels=80, min_size=2, max_timing=200, start=datetime(2023, 5, 1), unit=timedelta(hours=1))
+        self.participants = tuple(sorted(self.cn.participants()))
+
+    def assert_frames(self, cutoffs, cn=None, min_timing=datetime.min):
+        cn = cn or self.cn
+        rng = random.Random(0)
+        results = {}
+        for distance_type in DistanceType:
+            results[distance_type] = [(source, single_source_dijkstra_hyperedges(cn, source, distance_type, min_timing=min_timing, cutoff=cutoffs.get(distance_type)))
+                                      for source in self.participants]
+            rng.shuffle(results[distance_type])  # results arrive in order of completion
+
+        builder = DistanceFrameBuilder(self.participants)
+        for distance_type, distances in results.items():
+            for source, targets in distances:
+                builder.add(distance_type, source, targets)
+
+        self.assertEqual(len(builder), sum(len(targets) for distances in results.values() for _, targets in distances))
+        result = builder.build()
+        expected = sorted_frame(self.participants, results)
+        self.assertTrue(result.equals(expected))
+        self.assertTrue(result.index.equals(expected.index))
+        self.assertEqual(list(result.dtypes), list(expected.dtypes))
+        self.assertEqual(result.to_csv(), expected.to_csv())
+
+    def test_build(self):
+        """
+        Tests that the built frame equals the frame of sorting the collected rows
+        """
+        self.assert_frames({})
+
+    def test_build_with_cutoffs(self):
+        """
+        Tests that targets reached by some distance types only have missing values for the others
+        """
+        self.assert_frames({DistanceType.SHORTEST: 2, DistanceType.FASTEST: timedelta(hours=48)})
+
+    def test_build_with_other_timings(self):
+        """
+        Tests typed and untyped timings: integers, and timezone-aware timings that numpy keeps as objects
+        """
+        channels = {channel: self.cn.participants(channel) for channel in self.cn.channels()}
+        base = datetime(2023, 5, 1)
+        for timings, min_timing in (({channel: int((timing - base).total_seconds()) for channel, timing in self.cn.timings().items()}, 0),
+                                    ({channel: timing.replace(tzinfo=timezone.utc) for channel, timing in self.cn.timings().items()}, timedelta(0))):
+            with self.subTest(timing_type=type(next(iter(timings.values())))):
+                self.assert_frames({DistanceType.SHORTEST: 2}, cn=CommunicationNetwork(channels, timings), min_timing=min_timing)
+
+    def test_nbytes(self):
+        """
+        Tests that the held results are counted with the distances, including the objects that numpy does not type
+        """
+        distances = {distance_type: {source: single_source_dijkstra_hyperedges(self.cn, source, distance_type) for source in self.participants}
+                     for distance_type in DistanceType}
+        builder = DistanceFrameBuilder(self.participants)
+        for distance_type, results in distances.items():
+            for source, targets in results.items():
+                builder.add(distance_type, source, targets)
+
+        rows = len(builder)
+        self.assertEqual(builder.nbytes, sum(targets.nbytes + values.nbytes for results in builder._results.values() for targets, values in results.values()))
+        self.assertGreaterEqual(builder.nbytes, 8 * rows)
+
+        aware = DistanceFrameBuilder(self.participants, distance_types=(DistanceType.FOREMOST, ))
+        for source, targets in distances[DistanceType.FOREMOST].items():
+            aware.add(DistanceType.FOREMOST, source, {target: timing.replace(tzinfo=timezone.utc) for target, timing in targets.items()})
+        self.assertGreaterEqual(aware.nbytes, len(aware) * (8 + sys.getsizeof(datetime.now(timezone.utc))))
@@ -2,9 +2,17 @@ import unittest
 
 from simulation.model import CommunicationNetwork, TimeVaryingHypergraph, EntityNotFound
 from simulation.minimal_paths import single_source_dijkstra_vertices, single_source_dijkstra_hyperedges, DistanceType
+from simulation.minimal_paths import single_pair_dijkstra_hyperedges, single_target_dijkstra_hyperedges, single_source_fastest_profile
+from simulation.minimal_paths import ENGINES, supports, time_sorted_incidence
+from simulation import minimal_paths
 
+import gc
+import pickle
+import weakref
 from datetime import timedelta
 
+from .networks import random_network
+
 class TestMinimalPath(unittest.TestCase):
     def __init__(self, methodName=None):
         super().__init__(methodName=methodName)
@@ -234,3 +242,181 @@ class TestHypergraphPaths(unittest.TestCase):
 
         self.assertEqual(result_fastest, expected_fastest_distance)
         self.assertEqual(result_fastest, single_source_dijkstra_vertices(self.conflicting_hypergraph, source_vertex, DistanceType.FASTEST))
+
+    def test_cutoff(self):
+        """
+        Tests the horizon-bounded searches
+
+        Checks that a cutoff drops exactly the vertices beyond the horizon for
+        all three distance types and that both implementations agree.
+        """
+
+        # Arrange
+        source_vertex = 'v1'
+        cutoffs = {
+            DistanceType.SHORTEST: 1,
+            DistanceType.FASTEST: timedelta(0),
+            DistanceType.FOREMOST: timedelta(days=1),
+        }
+
+        for distance_type, cutoff in cutoffs.items():
+            # Act
+            unbounded = single_source_dijkstra_hyperedges(self.conflicting_hypergraph, source_vertex, distance_type, min_timing=timedelta(0))
+            result_hyperedges = single_source_dijkstra_hyperedges(self.conflicting_hypergraph, source_vertex, distance_type, min_timing=timedelta(0), cutoff=cutoff)
+            result_vertices = single_source_dijkstra_vertices(self.conflicting_hypergraph, source_vertex, distance_type, min_timing=timedelta(0), cutoff=cutoff)
+
+            # Assert
+            expected = {vertex: distance for vertex, distance in unbounded.items() if distance <= cutoff}
+            self.assertEqual(expected, result_hyperedges)
+            self.assertEqual(expected, result_vertices)
+            self.assertLess(len(result_hyperedges), len(unbounded))
+
+        # A cutoff before all hyperedges of the source reaches nothing
+        for single_source_dijkstra in (single_source_dijkstra_hyperedges, single_source_dijkstra_vertices):
+            self.assertEqual(single_source_dijkstra(self.conflicting_hypergraph, source_vertex, DistanceType.FOREMOST, min_timing=timedelta(0), cutoff=timedelta(0)), {})
+
+    def test_single_pair(self):
+        """
+        Tests the point-to-point query against the single-source search
+
+        For every pair of vertices and every distance type, the point-to-point
+        distance must equal the single-source distance, or None if the target
+        is not reachable.
+        """
+
+        vertices = sorted(self.conflicting_hypergraph.vertices())
+        for distance_type in DistanceType:
+            for source_vertex in vertices:
+                # Act
+                expected = single_source_dijkstra_hyperedges(self.conflicting_hypergraph, source_vertex, distance_type, min_timing=timedelta(0))
+                for target_vertex in vertices:
+                    result = single_pair_dijkstra_hyperedges(self.conflicting_hypergraph, source_vertex, target_vertex, distance_type, min_timing=timedelta(0))
+
+                    # Assert
+                    self.assertEqual(expected.get(target_vertex), result, f'{distance_type.name} distance from {source_vertex} to {target_vertex}')
+
+        with self.assertRaises(EntityNotFound):
+            single_pair_dijkstra_hyperedges(self.conflicting_hypergraph, 'v1', 'xx', DistanceType.SHORTEST)
+
+    def test_single_target(self):
+        """
+        Tests the reverse (who-can-reach-me) search against the forward search
+
+        Builds a random time-varying hypergraph and checks that, for every
+        target and distance type, the reverse search finds exactly the sources
+        whose forward search reaches the target, with the same distances.
+        """
+        # Arrange
+        hypergraph = random_network(42)
+        participants = sorted(hypergraph.vertices())
+
+        for distance_type in DistanceType:
+            forward = {source: single_source_dijkstra_hyperedges(hypergraph, source, distance_type, min_timing=timedelta(0)) for source in participants}
+            for target in participants:
+                # Act
+                result = single_target_dijkstra_hyperedges(hypergraph, target, distance_type, min_timing=timedelta(0))
+
+                # Assert
+                expected = {source: distances[target] for source, distances in forward.items() if target in distances}
+                self.assertEqual(expected, result, f'{distance_type.name} sources reaching {target}')
+
+    def test_vertices_equivalent_on_random_graphs(self):
+        """
+        Tests that the pruned vertex-based search matches the hyperedge-based search
+
+        Builds random time-varying hypergraphs with many ties in timings, so that
+        vertices are reached by many dominated labels, and compares both
+        implementations for every source and distance type.
+        """
+        for seed in range(5):
+            # Arrange
+            hypergraph = random_network(seed, num_participants=15, num_channels=40, max_size=5, max_timing=8)
+
+            for distance_type in DistanceType:
+                for source in sorted(hypergraph.vertices()):
+                    # Act
+                    result_hyperedges = single_source_dijkstra_hyperedges(hypergraph, source, distance_type, min_timing=timedelta(0))
+                    result_vertices = single_source_dijkstra_vertices(hypergraph, source, distance_type, min_timing=timedelta(0))
+
+                    # Assert
+                    self.assertEqual(result_hyperedges, result_vertices, f'{distance_type.name} distances from {source}')
+
+    def test_fastest_profile_equivalent_on_random_graphs(self):
+        """
+        Tests that the fastest profile search matches the hyperedge-based search
+
+        Builds random time-varying hypergraphs with many ties in timings and
+        sources with many departures, and compares both implementations for
+        every source, with and without a cutoff.
+        """
+        for seed in range(10):
+            # Arrange
+            hypergraph = random_network(seed, num_participants=15, num_channels=60, max_size=5, max_timing=12)
+
+            for cutoff in (None, timedelta(days=3)):
+                for source in sorted(hypergraph.vertices()):
+                    # Act
+                    result_hyperedges = single_source_dijkstra_hyperedges(hypergraph, source, DistanceType.FASTEST, min_timing=timedelta(0), cutoff=cutoff)
+                    result_profile = single_source_fastest_profile(hypergraph, source, DistanceType.FASTEST, min_timing=timedelta(0), cutoff=cutoff)
+
+                    # Assert
+                    self.assertEqual(result_hyperedges, result_profile, f'fastest distances from {source} within {cutoff}')
+
+    def test_compacted_equivalent_on_random_graphs(self):
+        """
+        Tests that compacting a communication network preserves all minimal distances
+
+        Builds random networks with many single-participant channels and
+        duplicate channels (and near-duplicates with another timing, which must
+        be kept), and compares the distances in the original and the compacted
+        network for every engine, distance type, and source.
+        """
+        for seed in range(5):
+            # Arrange
+            network = random_network(seed, num_channels=50, duplicates=0.3)
+            compacted = CommunicationNetwork.compacted({channel: network.participants(channel) for channel in network.channels()}, network.timings())
+
+            self.assertEqual(network.participants(), compacted.participants())
+            for engine, function in ENGINES.items():
+                for distance_type in DistanceType:
+                    if not supports(engine, distance_type):
+                        continue
+                    for source in sorted(network.participants()):
+                        # Act
+                        result = function(network, source, distance_type, min_timing=timedelta(0))
+                        result_compacted = function(compacted, source, distance_type, min_timing=timedelta(0))
+
+                        # Assert
+                        self.assertEqual(result, result_compacted, f'{engine} {distance_type.name} distances from {source}')
+
+    def test_fastest_profile(self):
+        """
+        Tests the fastest profile search on a known hypergraph and that it only supports fastest distances
+        """
+        result = single_source_fastest_profile(self.conflicting_hypergraph, 'v1', DistanceType.FASTEST, min_timing=timedelta(0))
+
+        self.assertEqual(result, single_source_dijkstra_hyperedges(self.conflicting_hypergraph, 'v1', DistanceType.FASTEST, min_timing=timedelta(0)))
+        with self.assertRaises(ValueError):
+            single_source_fastest_profile(self.conflicting_hypergraph, 'v1', DistanceType.SHORTEST)
+        with self.assertRaises(EntityNotFound):
+            single_source_fastest_profile(self.conflicting_hypergraph, 'v6', DistanceType.FASTEST)
+
+    def test_incidence_index_dies_with_hypergraph(self):
+        """
+        Tests that the cached time-sorted incidence of a hypergraph does not keep it alive
+
+        -Reuses the index for searches on the same hypergraph
+        -Releases the hypergraph and its index once no caller holds the hypergraph
+        -Keeps pickling the hypergraph without its weak references
+        """
+        hypergraph = CommunicationNetwork({'h1': ['v1', 'v2'], 'h2': ['v2', 'v3']}, {'h1': 2, 'h2': 1})
+        incidence = time_sorted_incidence(hypergraph)
+        self.assertIs(time_sorted_incidence(hypergraph), incidence)
+        self.assertEqual(incidence['v2'], ((1, 2), ('h2', 'h1')))
+        self.assertEqual(pickle.loads(pickle.dumps(hypergraph)).timings('h1'), 2)
+
+        reference = weakref.ref(hypergraph)
+        del hypergraph, incidence
+        gc.collect()
+        self.assertIsNone(reference())
+        self.assertEqual(len(minimal_paths._incidence_cache), 0)
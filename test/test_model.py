@@ -106,6 +106,93 @@ class TestCommunicationNetwork(unittest.TestCase):
         expected_timings = {'channel1': datetime.fromisoformat(json_mock_data['channel1']['end']), 'channel2': datetime.fromisoformat(json_mock_data['channel2']['end'])}
         self.assertEqual(cn.timings(), expected_timings)
 
+    @patch('pathlib.Path.open', new_callable=mock_open)
+    def test_load_json_lean(self, mock_file_open):
+        """
+        This function tests that a loaded CommunicationNetwork is stored compactly
+
+        -Loads a JSON file in which a participant occurs in several channels
+        -Checks that all occurrences of a participant ID are the same (interned) object
+        -Checks that incidences are frozen into tuples and duplicates are dropped
+        -Checks that the network has no per-instance __dict__
+        """
+        # Arrange
+        json_mock_data = {
+            'channel1': {'participants': ['participant_1', 'participant_2', 'participant_1'], 'end': '2023-05-27'},
+            'channel2': {'participants': ['participant_1', 'participant_3'], 'end': '2023-05-28'}
+        }
+        try:
+            json_bytes = json.dumps(json_mock_data).encode('utf-8')
+        except AttributeError:
+            json_bytes = json.dumps(json_mock_data)
+        mock_file_open.return_value.read.return_value = json_bytes
+
+        # Act
+        cn = CommunicationNetwork.from_json('./data/networks/fake.json', name='fake')
+
+        # Assert
+        first, = [p for p in cn._hedges['channel1'] if p == 'participant_1']
+        second, = [p for p in cn._hedges['channel2'] if p == 'participant_1']
+        self.assertIs(first, second)
+        self.assertEqual(cn._hedges['channel1'], ('participant_1', 'participant_2'))
+        self.assertEqual(cn._vertices['participant_1'], ('channel1', 'channel2'))
+        self.assertEqual(cn.participants('channel1'), {'participant_1', 'participant_2'})
+        self.assertEqual(cn.name, 'fake')
+        self.assertFalse(hasattr(cn, '__dict__'))
+
+    def test_compacted(self):
+        """
+        This function tests compacting a CommunicationNetwork
+
+        -Builds a network with a single-participant channel, an empty channel, and duplicate channels
+        -Checks that only the first of the duplicates and the channels with several participants remain
+        -Checks that all participants are kept, also those without any remaining channel
+        -Checks that each remaining channel maps to the original channels it stands for
+        """
+        # Arrange
+        channels = {'h1': ['v1', 'v2'], 'h2': ['v2', 'v1', 'v2'], 'h3': ['v3'], 'h4': [], 'h5': ['v1', 'v2'], 'h6': ['v2', 'v4']}
+        timings = {'h1': 1, 'h2': 1, 'h3': 2, 'h4': 3, 'h5': 2, 'h6': 1}
+
+        # Act
+        cn = CommunicationNetwork.compacted(channels, timings, name='compact')
+
+        # Assert
+        self.assertEqual(cn.channels(), {'h1', 'h5', 'h6'})
+        self.assertEqual(cn.participants(), {'v1', 'v2', 'v3', 'v4'})
+        self.assertEqual(cn.channels('v3'), set())
+        self.assertEqual(cn.timings(), {'h1': 1, 'h5': 2, 'h6': 1})
+        self.assertEqual(cn.channel_origins, {'h1': ('h1', 'h2'), 'h5': ('h5', ), 'h6': ('h6', )})
+        self.assertEqual(cn.name, 'compact')
+        self.assertIsNone(CommunicationNetwork(channels, timings).channel_origins)
+
+    @patch('pathlib.Path.open', new_callable=mock_open)
+    def test_load_json_compact(self, mock_file_open):
+        """
+        This function tests loading a compacted CommunicationNetwork from a JSON file
+
+        -Loads a JSON file with a duplicate and a single-participant channel with compact=True
+        -Checks that both channels are dropped, but their participants are kept
+        """
+        # Arrange
+        json_mock_data = {
+            'channel1': {'participants': ['participant_1', 'participant_2'], 'end': '2023-05-27'},
+            'channel2': {'participants': ['participant_2', 'participant_1'], 'end': '2023-05-27'},
+            'channel3': {'participants': ['participant_3'], 'end': '2023-05-28'}
+        }
+        try:
+            json_bytes = json.dumps(json_mock_data).encode('utf-8')
+        except AttributeError:
+            json_bytes = json.dumps(json_mock_data)
+        mock_file_open.return_value.read.return_value = json_bytes
+
+        # Act
+        cn = CommunicationNetwork.from_json('./data/networks/fake.json', compact=True)
+
+        # Assert
+        self.assertEqual(cn.channels(), {'channel1'})
+        self.assertEqual(cn.participants(), {'participant_1', 'participant_2', 'participant_3'})
+        self.assertEqual(cn.channel_origins, {'channel1': ('channel1', 'channel2')})
+
     def test_cn_with_data(self):
         """
         This function tests a CommunicationNetwork using pre-made data
@@ -4,6 +4,8 @@ import io
 import os
 import hashlib
 
+from simulation.results import open_results, COLUMNS_SUFFIX
+
 
 # For notebook generation
 import pandas as pd
@@ -20,7 +22,8 @@ class TestNotebookPlot(unittest.TestCase):
         super().__init__(methodName=methodName)
         # Additional initialization
 
-        if os.path.exists(os.path.join(os.getcwd(), "data/minimal_paths/microsoft.pickle.bz2")):
+        results_path = os.path.join(os.getcwd(), "data/minimal_paths/microsoft")
+        if os.path.exists(results_path + COLUMNS_SUFFIX) or os.path.exists(results_path + ".pickle.bz2"):
             self.notebook = importlib.import_module("ipynb.fs.full.notebooks.plot")
         else:
             self.notebook = None
@@ -30,7 +33,7 @@ class TestNotebookPlot(unittest.TestCase):
             self.skipTest("Data not available")
         
         # Act
-        test = pd.read_pickle(os.path.join(os.getcwd(), "data/minimal_paths/microsoft.pickle.bz2"))
+        test = open_results(os.path.join(os.getcwd(), "data/minimal_paths/microsoft")).frame(columns=['fastest'])
         result = self.notebook.compute(test)
 
         # Arrange
@@ -55,7 +58,7 @@ class TestNotebookPlot(unittest.TestCase):
         if self.notebook is None:
             self.skipTest("Data not available")
         # Act
-        test = pd.read_pickle(os.path.join(os.getcwd(), "data/minimal_paths/microsoft.pickle.bz2"))
+        test = open_results(os.path.join(os.getcwd(), "data/minimal_paths/microsoft")).frame(columns=['fastest'])
         result = self.copy_compute(test)
 
         # Arrange
@@ -68,7 +71,7 @@ class TestNotebookPlot(unittest.TestCase):
         self.assertEqual(test_unique_values.categories.tolist(), result_categories.tolist())
 
     def copy_generate_notebook(self):
-        microsoft = pd.read_pickle('../data/minimal_paths/microsoft.pickle.bz2')
+        microsoft = open_results('../data/minimal_paths/microsoft').frame(columns=['fastest'])
 
 
         ecdfs_over_time = self.notebook.compute(microsoft)
@@ -0,0 +1,88 @@
+import bz2
+import unittest
+import tempfile
+from pathlib import Path
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from simulation.output import write_results, CompressedWriter, Compression, COMPRESSIONS
+
+
+class TestOutput(unittest.TestCase):
+    def __init__(self, methodName=None):
+        super().__init__(methodName=methodName)
+        # Additional initialization
+        participants = [f'v{i}' for i in range(60)]
+        category = pd.api.types.CategoricalDtype(categories=participants, ordered=False)
+        index = pd.MultiIndex.from_product([pd.CategoricalIndex(participants, dtype=category)] * 2, names=['source', 'target'])
+        self.result = pd.DataFrame({
+            'shortest': [i % 7 + 1 for i in range(len(index))],
+            'fastest': [timedelta(hours=i % 13) for i in range(len(index))],
+            'foremost': [datetime(2023, 5, 1) + timedelta(minutes=i) for i in range(len(index))],
+        }, index=index)
+
+    def test_strict_bz2(self):
+        """
+        Tests that the default compression writes exactly the files of pandas' bz2 compression
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            directory = Path(directory)
+            self.result.to_csv(directory/'expected.csv.bz2', compression='bz2')
+            self.result.to_pickle(directory/'expected.pickle.bz2', compression='bz2')
+
+            paths = write_results(self.result, directory/'result', num_threads=2)
+
+            self.assertEqual(paths, [f'{directory/"result"}.csv.bz2', f'{directory/"result"}.pickle.bz2'])
+            self.assertEqual((directory/'result.csv.bz2').read_bytes(), (directory/'expected.csv.bz2').read_bytes())
+            self.assertEqual((directory/'result.pickle.bz2').read_bytes(), (directory/'expected.pickle.bz2').read_bytes())
+
+    def test_parallel_bz2(self):
+        """
+        Tests that the concatenated bz2 streams decompress to the uncompressed results
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            directory = Path(directory)
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                with CompressedWriter(directory/'result.csv.bz2', COMPRESSIONS['bz2-parallel'], executor, num_threads=2, block_size=1000) as file:
+                    self.result.to_csv(file, mode='wb')
+
+            data = (directory/'result.csv.bz2').read_bytes()
+            self.assertGreater(data.count(b'BZh9'), 1)  # one stream per block
+            self.assertEqual(bz2.decompress(data), self.result.to_csv().encode('utf-8'))
+
+            write_results(self.result, directory/'result', compression='bz2-parallel', num_threads=2)
+            self.assertTrue(pd.read_pickle(directory/'result.pickle.bz2').equals(self.result))
+
+    def test_optional_compressions(self):
+        """
+        Tests that zstd and lz4 compressed results decompress to the uncompressed results, if the libraries are installed
+        """
+        for name in ('zstd', 'lz4'):
+            compression = COMPRESSIONS[name]
+            if not compression.available:
+                continue
+            with tempfile.TemporaryDirectory() as directory:
+                path = Path(directory)/'result'
+                csv_path, pickle_path = write_results(self.result, path, compression=name, num_threads=2)
+                module = __import__('zstandard') if name == 'zstd' else __import__('lz4.frame').frame
+                with module.open(csv_path, 'rb') as file:
+                    self.assertEqual(file.read(), self.result.to_csv().encode('utf-8'))
+                with module.open(pickle_path, 'rb') as file:
+                    self.assertTrue(pd.read_pickle(file).equals(self.result))
+
+    def test_errors(self):
+        """
+        Tests that unknown compressions raise a ValueError and that failed writes leave no truncated files
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(ValueError):
+                write_results(self.result, Path(directory)/'result', compression='gzip')
+            with self.assertRaises(AttributeError):
+                write_results(None, Path(directory)/'result')
+            self.assertEqual(list(Path(directory).iterdir()), [])
+        with self.assertRaises(ValueError):
+            Compression('.bz2')
+        with self.assertRaises(ValueError):
+            Compression('.bz2', compress=bz2.compress, compressor=bz2.BZ2Compressor)
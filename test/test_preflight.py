@@ -0,0 +1,259 @@
+import unittest
+import io
+import os
+import bz2
+import json
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+from contextlib import redirect_stdout, redirect_stderr
+from unittest.mock import patch, mock_open
+
+from simulation.minimal_paths import ENGINES, DistanceType, single_source_dijkstra_hyperedges
+from simulation.frames import DistanceFrameBuilder
+from simulation.preflight import Preflight, ReachPreflight, network_statistics, available_memory, BYTES_PER_REACH_COUNT
+from simulation.reach import reachable_vertices
+from simulation.run import run_simulation
+
+from .networks import RAW_NETWORK, random_network, small_network
+
+
+class TestPreflight(unittest.TestCase):
+    def __init__(self, methodName=None):
+        super().__init__(methodName=methodName)
+        # Additional initialization
+        self.cn = small_network()
+
+    def test_network_statistics(self):
+        """
+        Tests the degree and hyperedge-size distributions and the total incidence
+        """
+        stats = network_statistics(self.cn)
+
+        self.assertEqual(stats['vertices'], 5)
+        self.assertEqual(stats['hyperedges'], 6)
+        self.assertEqual(stats['incidence'], 12)
+        self.assertEqual(stats['degree']['max'], 3)
+        self.assertEqual(stats['hyperedge_size']['min'], 2)
+        self.assertEqual(stats['hyperedge_size']['max'], 2)
+
+    def test_selection_and_projection(self):
+        """
+        Tests that the preflight selects an available engine per distance type and projects a plausible run
+
+        -Selects one of the sampled engines for every distance type
+        -Does not use more processes than requested or than there are sources
+        -Projects positive RAM and output sizes
+        """
+        preflight = Preflight(self.cn, num_processes=2, sample_size=3)
+
+        for distance_type in DistanceType:
+            self.assertIn(preflight.engines[distance_type], ENGINES)
+            self.assertIn((distance_type, preflight.engines[distance_type]), preflight.costs)
+        self.assertEqual(preflight.num_processes, 2)
+        self.assertGreater(preflight.memory, 0)
+        self.assertGreater(preflight.output_size['csv'], 0)
+        self.assertIn('Projection with 2 processes', preflight.report())
+
+        preflight = Preflight(self.cn, engines=('vertices', ), num_processes=64, sample_size=3)
+        self.assertEqual(set(preflight.engines.values()), {'vertices'})
+        self.assertEqual(preflight.num_processes, 5)
+
+    def test_parent_memory(self):
+        """
+        Tests that the projected parent memory matches what the frame builder holds and allocates when building
+        """
+        cn = random_network(1, num_participants=60, num_channels=200, min_size=2, max_timing=500, start=datetime(2023, 5, 1), unit=timedelta(hours=1))
+        participants = tuple(sorted(cn.participants()))
+        preflight = Preflight(cn, engines=('hyperedges', ), sample_size=len(participants))
+        results = {distance_type: {source: single_source_dijkstra_hyperedges(cn, source, distance_type) for source in participants}
+                   for distance_type in DistanceType}
+
+        tracemalloc.start()
+        try:
+            builder = DistanceFrameBuilder(participants)
+            for distance_type, distances in results.items():
+                for source, targets in distances.items():
+                    builder.add(distance_type, source, targets)
+            held = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            builder.build()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        self.assertGreater(held, 0)
+        self.assertAlmostEqual(preflight.parent_memory / peak, 1, delta=0.2)
+
+    def test_memory_limit(self):
+        """
+        Tests the worker count if the available memory rather than the CPUs limits it
+
+        -Provides the memory for the results and three and a half workers
+        -Checks that the preflight uses three (integral) processes
+        -Checks that a network whose results alone exceed the memory is reported as not fitting
+        """
+        preflight = Preflight(self.cn, sample_size=3)
+        available = preflight.parent_memory + 3.5 * preflight.worker_memory
+
+        with patch('simulation.preflight.available_memory', return_value=available), patch('simulation.preflight.mp.cpu_count', return_value=8):
+            preflight = Preflight(self.cn, sample_size=3)
+
+        self.assertEqual(preflight.num_processes, 3)
+        self.assertIsInstance(preflight.num_processes, int)
+        self.assertTrue(preflight.fits)
+        self.assertIn('Projection with 3 processes', preflight.report())
+        self.assertNotIn('Warning', preflight.report())
+
+        with patch('simulation.preflight.available_memory', return_value=5 * 2**20):
+            preflight = Preflight(self.cn, sample_size=3)
+
+        self.assertEqual(preflight.num_processes, 1)
+        self.assertFalse(preflight.fits)
+        self.assertIn('Warning: the projected RAM exceeds the available memory', preflight.report())
+
+    def test_available_memory(self):
+        """
+        Tests that the available memory includes the reclaimable page cache and that only it is reliable
+
+        -Reads MemAvailable rather than MemFree
+        -Falls back to the free memory, which only warns that the run does not fit
+        """
+        meminfo = 'MemTotal:       8000000 kB\nMemFree:        1000000 kB\nMemAvailable:   5000000 kB\n'
+        with patch('builtins.open', mock_open(read_data=meminfo)):
+            self.assertEqual(available_memory(), 5000000 * 1024)
+
+        with patch('simulation.preflight.available_memory', return_value=None), patch('simulation.preflight.free_memory', return_value=5 * 2**20):
+            preflight = Preflight(self.cn, sample_size=3)
+        self.assertFalse(preflight.reliable_memory)
+        self.assertFalse(preflight.fits)
+        self.assertIn('free memory only', preflight.report())
+
+    def test_plan_with_reusable_memory(self):
+        """
+        Tests that the memory of workers that will be reused counts as available when sizing the pool
+        """
+        preflight = Preflight(self.cn, sample_size=3)
+        available = preflight.parent_memory + 1.5 * preflight.worker_memory
+
+        with patch('simulation.preflight.available_memory', return_value=available), patch('simulation.preflight.mp.cpu_count', return_value=8):
+            preflight.plan()
+            self.assertEqual(preflight.num_processes, 1)
+            preflight.plan(reusable_memory=2 * preflight.worker_memory)
+            self.assertEqual(preflight.num_processes, 3)
+            preflight.plan(2, reusable_memory=2 * preflight.worker_memory)
+            self.assertEqual(preflight.num_processes, 2)
+
+    def test_refuse_without_memory(self):
+        """
+        Tests that a run which does not fit into the available memory only starts with --ignore_memory
+
+        -Refuses the run if the available memory is known
+        -Starts with --ignore_memory, or if only the free memory is known
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.makedirs(os.path.join(tmp_dir, 'data', 'networks'))
+            with open(os.path.join(tmp_dir, 'data', 'networks', 'microsoft.json.bz2'), 'wb') as file:
+                file.write(bz2.compress(json.dumps(RAW_NETWORK).encode('utf-8')))
+
+            cwd = os.getcwd()
+            os.chdir(tmp_dir)
+            try:
+                with patch('simulation.preflight.available_memory', return_value=5 * 2**20), redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+                    with patch('sys.argv', ['simulation.run', '--preflight_samples', '2']), self.assertRaises(SystemExit):
+                        run_simulation()
+                    refused = os.listdir(os.path.join('data', 'minimal_paths'))
+                    with patch('sys.argv', ['simulation.run', '--preflight_samples', '2', '--num_processes', '1', '--ignore_memory']):
+                        run_simulation()
+                    ignored = os.listdir(os.path.join('data', 'minimal_paths'))
+                for path in ignored:
+                    os.remove(os.path.join('data', 'minimal_paths', path))
+                with patch('simulation.preflight.available_memory', return_value=None), patch('simulation.preflight.free_memory', return_value=5 * 2**20), \
+                        patch('sys.argv', ['simulation.run', '--preflight_samples', '2', '--num_processes', '1']), redirect_stdout(io.StringIO()) as stdout:
+                    run_simulation()
+                unreliable = os.listdir(os.path.join('data', 'minimal_paths'))
+            finally:
+                os.chdir(cwd)
+
+            self.assertEqual(refused, [])
+            self.assertCountEqual(ignored, ['microsoft.csv.bz2', 'microsoft.pickle.bz2'])
+            self.assertCountEqual(unreliable, ['microsoft.csv.bz2', 'microsoft.pickle.bz2'])
+            self.assertIn('free memory only', stdout.getvalue())
+
+    def test_distance_type_specific_engines(self):
+        """
+        Tests that engines for a single distance type are only sampled and selected for it
+        """
+        preflight = Preflight(self.cn, num_processes=2, sample_size=3)
+
+        self.assertEqual({distance_type for distance_type, engine in preflight.costs if engine == 'fastest_profile'}, {DistanceType.FASTEST})
+        for distance_type in (DistanceType.SHORTEST, DistanceType.FOREMOST):
+            self.assertNotEqual(preflight.engines[distance_type], 'fastest_profile')
+        preflight = Preflight(self.cn, engines=('fastest_profile', ), num_processes=2, sample_size=3)
+        self.assertEqual(preflight.engines[DistanceType.FASTEST], 'fastest_profile')
+        self.assertEqual(preflight.engines[DistanceType.SHORTEST], 'hyperedges')
+
+    def test_reach_preflight(self):
+        """
+        Tests that the preflight of reach-only runs samples the reach search instead of the distance engines
+
+        -Samples no distance engine and projects no CSV or pickle output
+        -Holds only the reach counts (and bitsets) in the parent
+        -Reaches fewer vertices per source within an earlier latest timing
+        """
+        with patch('simulation.preflight.sample_costs') as sample_costs:
+            preflight = ReachPreflight(self.cn, num_processes=2, sample_size=5)
+        sample_costs.assert_not_called()
+
+        reached = [len(reachable_vertices(self.cn, vertex)) for vertex in self.cn.vertices()]
+        self.assertAlmostEqual(preflight.reach_cost['reached_per_source'], sum(reached) / len(reached))
+        self.assertEqual(preflight.parent_memory, 5 * BYTES_PER_REACH_COUNT)
+        self.assertEqual(preflight.num_processes, 2)
+        self.assertIsInstance(preflight.num_processes, int)
+        self.assertIn('reach    via earliest arrival', preflight.report())
+        self.assertNotIn('CSV', preflight.report())
+
+        preflight = ReachPreflight(self.cn, sample_size=5, latest=datetime(2023, 5, 1), bitsets=True)
+        self.assertLess(preflight.reach_cost['reached_per_source'], sum(reached) / len(reached))
+        self.assertEqual(preflight.parent_memory, 5 * BYTES_PER_REACH_COUNT + 5 * 1)
+
+    def test_dry_run(self):
+        """
+        Tests that a dry run prints the preflight report and writes no results
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.makedirs(os.path.join(tmp_dir, 'data', 'networks'))
+            with open(os.path.join(tmp_dir, 'data', 'networks', 'microsoft.json.bz2'), 'wb') as file:
+                file.write(bz2.compress(json.dumps(RAW_NETWORK).encode('utf-8')))
+
+            cwd = os.getcwd()
+            os.chdir(tmp_dir)
+            try:
+                with patch('sys.argv', ['simulation.run', '--dry-run', '--preflight_samples', '2']), redirect_stdout(io.StringIO()) as stdout:
+                    run_simulation()
+            finally:
+                os.chdir(cwd)
+
+            self.assertIn('Projection with', stdout.getvalue())
+            self.assertEqual(os.listdir(os.path.join(tmp_dir, 'data', 'minimal_paths')), [])
+
+    def test_reach_only_dry_run(self):
+        """
+        Tests that a reach-only dry run reports the reach preflight
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.makedirs(os.path.join(tmp_dir, 'data', 'networks'))
+            with open(os.path.join(tmp_dir, 'data', 'networks', 'microsoft.json.bz2'), 'wb') as file:
+                file.write(bz2.compress(json.dumps(RAW_NETWORK).encode('utf-8')))
+
+            cwd = os.getcwd()
+            os.chdir(tmp_dir)
+            try:
+                with patch('sys.argv', ['simulation.run', '--dry-run', '--reach-only', '--preflight_samples', '2']), redirect_stdout(io.StringIO()) as stdout:
+                    run_simulation()
+            finally:
+                os.chdir(cwd)
+
+            self.assertIn('reach    via earliest arrival', stdout.getvalue())
+            self.assertIn('npz', stdout.getvalue())
+            self.assertNotIn('shortest', stdout.getvalue())
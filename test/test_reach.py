@@ -0,0 +1,68 @@
+import os
+import unittest
+import tempfile
+from datetime import datetime, timedelta
+
+from simulation import all_pairs_reachable
+from simulation.model import EntityNotFound
+from simulation.minimal_paths import single_source_dijkstra_hyperedges, DistanceType
+from simulation.reach import reachable_vertices, incidence_index, ReachSets, load_reach, reachable_participants
+
+from .networks import random_network, small_network
+
+
+class TestReach(unittest.TestCase):
+    def __init__(self, methodName=None):
+        super().__init__(methodName=methodName)
+        # Additional initialization
+        self.cn = small_network()
+
+    def test_reachable_vertices(self):
+        """
+        Tests that the reachable vertices are exactly the targets of the foremost distances, with and without a latest timing
+        """
+        self.assertEqual(reachable_vertices(self.cn, 'v2'), {'v1', 'v3', 'v4', 'v5'})
+        self.assertEqual(reachable_vertices(self.cn, 'v2', latest=datetime(2023, 5, 2)), {'v1', 'v4'})
+        self.assertEqual(reachable_vertices(self.cn, 'v5', latest=datetime(2023, 5, 1)), set())
+        with self.assertRaises(EntityNotFound):
+            reachable_vertices(self.cn, 'v6')
+
+        for seed in range(10):
+            cn = random_network(seed, num_participants=5 + 4 * seed, num_channels=5 + 10 * seed, max_timing=48, start=datetime(2023, 5, 1), unit=timedelta(hours=1))
+            index = incidence_index(cn)
+            for latest in (None, datetime(2023, 5, 2)):
+                for source in cn.participants():
+                    expected = set(single_source_dijkstra_hyperedges(cn, source, DistanceType.FOREMOST, cutoff=latest))
+                    self.assertEqual(reachable_vertices(cn, source, latest=latest, index=index), expected)
+
+    def test_all_pairs_reachable(self):
+        """
+        Tests that every source is yielded once with its reachable vertices
+        """
+        result = dict(all_pairs_reachable(self.cn, latest=datetime(2023, 5, 3), num_processes=2))
+
+        self.assertEqual(result, {source: reachable_vertices(self.cn, source, latest=datetime(2023, 5, 3)) for source in self.cn.participants()})
+
+    def test_reach_sets(self):
+        """
+        Tests that the reach counts and bitsets are written and read back per source
+        """
+        participants = sorted(self.cn.participants())
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for bitsets in (False, True):
+                reach = ReachSets(participants, bitsets=bitsets)
+                for source in reversed(participants):
+                    reach.add(source, reachable_vertices(self.cn, source))
+                path = os.path.join(tmp_dir, f'reach_{bitsets}.npz')
+                reach.save(path)
+
+                result = load_reach(path)
+                self.assertEqual(result['participants'].tolist(), participants)
+                self.assertEqual(result['reach_counts'].tolist(), [len(reachable_vertices(self.cn, source)) for source in participants])
+                self.assertEqual(len(reach), sum(result['reach_counts']))
+                self.assertEqual('reachable' in result, bitsets)
+
+            for source in participants:
+                self.assertEqual(reachable_participants(result, source), reachable_vertices(self.cn, source))
+            with self.assertRaises(KeyError):
+                reachable_participants(result, 'v6')
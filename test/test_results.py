@@ -0,0 +1,83 @@
+import os
+import unittest
+import tempfile
+from datetime import datetime, timedelta
+
+from simulation.frames import DistanceFrameBuilder
+from simulation.minimal_paths import single_source_dijkstra_hyperedges, DistanceType
+from simulation.results import write_columns, DistanceResults, open_results, convert
+
+from .networks import random_network
+
+
+class TestDistanceResults(unittest.TestCase):
+    def __init__(self, methodName=None):
+        super().__init__(methodName=methodName)
+        # Additional initialization
+        cn = random_network(3, num_participants=25, num_channels=60, min_size=2, max_timing=200, start=datetime(2023, 5, 1), unit=timedelta(hours=1))
+        self.participants = tuple(sorted(cn.participants()))
+        cutoffs = {DistanceType.SHORTEST: 2}  # missing shortest distances
+        builder = DistanceFrameBuilder(self.participants)
+        for distance_type in DistanceType:
+            for source in self.participants:
+                builder.add(distance_type, source, single_source_dijkstra_hyperedges(cn, source, distance_type, cutoff=cutoffs.get(distance_type)))
+        self.result = builder.build()
+
+    def test_frame(self):
+        """
+        Tests that all columns load as the frame that was written
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            write_columns(self.result, os.path.join(tmp_dir, 'test.columns'))
+            results = DistanceResults(os.path.join(tmp_dir, 'test.columns'))
+
+            self.assertEqual(results.columns, ('shortest', 'fastest', 'foremost'))
+            self.assertEqual(len(results), len(self.result))
+            self.assertTrue(results.frame().equals(self.result))
+            self.assertTrue(results.column('fastest').equals(self.result.fastest))
+            self.assertEqual(list(results.frame().dtypes), list(self.result.dtypes))
+            self.assertFalse(os.path.exists(os.path.join(tmp_dir, 'test.columns.partial')))
+
+    def test_sources(self):
+        """
+        Tests that selected columns and sources load as the corresponding part of the frame
+        """
+        sources = ['v7', 'v3', 'v12']
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            write_columns(self.result, os.path.join(tmp_dir, 'test.columns'))
+            results = DistanceResults(os.path.join(tmp_dir, 'test.columns'))
+
+            expected = self.result.loc[self.result.index.get_level_values('source').isin(sources), ['foremost', 'shortest']]
+            self.assertTrue(results.frame(columns=['foremost', 'shortest'], sources=sources).equals(expected))
+            self.assertEqual(len(results.frame(sources=[])), 0)
+            with self.assertRaises(KeyError):
+                results.frame(sources=['v99'])
+            with self.assertRaises(KeyError):
+                results.column('latest')
+
+    def test_unsorted(self):
+        """
+        Tests that the rows of an unsorted frame are written in order of source and target
+        """
+        shuffled = self.result.sample(frac=1, random_state=0)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            write_columns(shuffled, os.path.join(tmp_dir, 'test.columns'))
+
+            self.assertTrue(DistanceResults(os.path.join(tmp_dir, 'test.columns')).frame().equals(self.result))
+
+    def test_open_results(self):
+        """
+        Tests that results are converted once from the pickle and then opened from the columns
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'test')
+            self.result.to_pickle(f'{path}.pickle.bz2', compression='bz2')
+
+            self.assertTrue(open_results(path).frame().equals(self.result))
+            os.remove(f'{path}.pickle.bz2')
+            self.assertTrue(open_results(path).frame().equals(self.result))
+
+            self.result.to_pickle(f'{path}.pickle.bz2', compression='bz2')
+            self.assertEqual(str(convert(f'{path}.pickle.bz2')), f'{path}.columns')
+            with self.assertRaises(FileNotFoundError):
+                DistanceResults(os.path.join(tmp_dir, 'other.columns'))
@@ -0,0 +1,109 @@
+import unittest
+import io
+import multiprocessing as mp
+import os
+import bz2
+import json
+import time
+import tempfile
+from contextlib import redirect_stdout, redirect_stderr
+from unittest.mock import patch
+
+import pandas as pd
+
+from simulation.model import CommunicationNetwork
+from simulation.minimal_paths import single_source_dijkstra_hyperedges, DistanceType
+from simulation.preflight import WORKER_BASE_MEMORY
+from simulation.run import run_simulation, _load
+
+
+class TestRunSimulation(unittest.TestCase):
+    def __init__(self, methodName=None):
+        super().__init__(methodName=methodName)
+        # Additional initialization
+        self.raw_networks = {
+            'first': {
+                'h1': {'participants': ['v1', 'v2'], 'end': '2023-05-01'},
+                'h2': {'participants': ['v1', 'v3'], 'end': '2023-05-01'},
+                'h3': {'participants': ['v2', 'v4', 'v5'], 'end': '2023-05-02'},
+                'h4': {'participants': ['v3', 'v4'], 'end': '2023-05-03'},
+            },
+            'second': {
+                'h1': {'participants': ['a', 'b', 'c'], 'end': '2023-06-01T12:00:00'},
+                'h2': {'participants': ['c', 'd'], 'end': '2023-06-02'},
+                'h3': {'participants': ['d', 'a'], 'end': '2023-06-01'},
+            },
+        }
+
+    def write_networks(self, tmp_dir):
+        os.makedirs(os.path.join(tmp_dir, 'data', 'networks'))
+        for name, raw_network in self.raw_networks.items():
+            with open(os.path.join(tmp_dir, 'data', 'networks', f'{name}.json.bz2'), 'wb') as file:
+                file.write(bz2.compress(json.dumps(raw_network).encode('utf-8')))
+
+    def test_pool_kept_while_workers_hold_memory(self):
+        """
+        Tests that the memory held by the workers of the pool does not shrink the pool for the next network
+
+        -Provides memory for two and a half workers, minus the memory of the running workers
+        -Checks that both networks are computed by the same pool of two workers
+        """
+        def memory():
+            return int(2.5 * WORKER_BASE_MEMORY) - len(mp.active_children()) * WORKER_BASE_MEMORY
+
+        def load(name, *args):
+            # The next network is loaded while the workers compute the first one
+            for _ in range(200):
+                if name == 'first' or len(mp.active_children()) >= 2:
+                    break
+                time.sleep(0.05)
+            return _load(name, *args)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.write_networks(tmp_dir)
+            cwd = os.getcwd()
+            os.chdir(tmp_dir)
+            try:
+                with patch('simulation.run.AVAILABLE_DATA_SETS', tuple(self.raw_networks)), \
+                        patch('sys.argv', ['simulation.run', '--select', 'first', 'second', '--preflight_samples', '1']), \
+                        patch('simulation.preflight.available_memory', side_effect=memory), \
+                        patch('simulation.preflight.mp.cpu_count', return_value=4), \
+                        patch('simulation.run._load', side_effect=load), \
+                        patch('simulation.run.ProcessPoolExecutor', wraps=__import__('concurrent.futures').futures.ProcessPoolExecutor) as pool, \
+                        redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+                    run_simulation()
+            finally:
+                os.chdir(cwd)
+
+            self.assertEqual(pool.call_count, 1)
+            self.assertEqual(pool.call_args.kwargs['max_workers'], 2)
+
+    def test_pipeline(self):
+        """
+        Tests that all selected networks are computed by one worker pool and written completely
+
+        -Runs the simulation on two networks
+        -Checks the written results against the single-source distances of each network
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.write_networks(tmp_dir)
+            cwd = os.getcwd()
+            os.chdir(tmp_dir)
+            try:
+                with patch('simulation.run.AVAILABLE_DATA_SETS', tuple(self.raw_networks)), \
+                        patch('sys.argv', ['simulation.run', '--select', 'first', 'second', '--num_processes', '2', '--preflight_samples', '1']), \
+                        patch('simulation.run.ProcessPoolExecutor', wraps=__import__('concurrent.futures').futures.ProcessPoolExecutor) as pool, \
+                        redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+                    run_simulation()
+                    results = {name: pd.read_pickle(os.path.join('data', 'minimal_paths', f'{name}.pickle.bz2')) for name in self.raw_networks}
+            finally:
+                os.chdir(cwd)
+
+            self.assertEqual(pool.call_count, 1)
+            for name, result in results.items():
+                cn = CommunicationNetwork.from_json(os.path.join(tmp_dir, 'data', 'networks', f'{name}.json.bz2'))
+                for distance_type in DistanceType:
+                    expected = {(source, target): distance for source in cn.participants()
+                                for target, distance in single_source_dijkstra_hyperedges(cn, source, distance_type).items()}
+                    column = result[distance_type.name.lower()]
+                    self.assertEqual({(source, target): distance for (source, target), distance in column.items()}, expected)
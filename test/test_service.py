@@ -0,0 +1,82 @@
+import unittest
+import threading
+from datetime import timedelta
+
+from simulation.model import EntityNotFound
+from simulation.minimal_paths import single_source_dijkstra_hyperedges, DistanceType
+from simulation.service import LRUCache, DistanceService, ServiceClient, serve
+
+from .networks import small_network
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_size_based_eviction(self):
+        """
+        Tests that the cache evicts the least recently used entries by size
+
+        -Fills the cache up to its maximum size
+        -Touches the oldest entry so that it becomes the most recently used
+        -Adds a large entry and checks that only the least recently used one is evicted
+        -Checks that an entry larger than the cache is not cached at all
+        """
+        cache = LRUCache(max_size=10)
+        cache.put('a', 1, size=4)
+        cache.put('b', 2, size=4)
+        self.assertEqual(cache.get('a'), 1)
+
+        cache.put('c', 3, size=5)
+        self.assertNotIn('b', cache)
+        self.assertIn('a', cache)
+        self.assertIn('c', cache)
+        self.assertEqual(cache.size, 9)
+
+        cache.put('d', 4, size=11)
+        self.assertNotIn('d', cache)
+        self.assertEqual(len(cache), 2)
+
+
+class TestDistanceService(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.cn = small_network()
+        cls.service = DistanceService(cls.cn, max_workers=2, cache_size=100)
+        cls.server = serve(cls.service)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.client = ServiceClient(f'http://127.0.0.1:{cls.server.server_address[1]}')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.service.close()
+
+    def test_single_source(self):
+        """
+        Tests that single-source queries over HTTP return the same distances as a local search
+        """
+        for distance_type in DistanceType:
+            expected = single_source_dijkstra_hyperedges(self.cn, 'v1', distance_type)
+            self.assertEqual(self.client.single_source('v1', distance_type), expected)
+            self.assertIn(('v1', distance_type, None), self.service.cache)
+
+    def test_single_pair_and_reach_count(self):
+        """
+        Tests point-to-point and reach-count queries, with and without a cached single-source result
+        """
+        self.assertEqual(self.client.single_pair('v2', 'v5', DistanceType.FASTEST), timedelta(days=3))
+        self.assertEqual(self.client.single_pair('v5', 'v2', DistanceType.SHORTEST), None)
+        self.assertEqual(self.client.single_pair('v1', 'v4', DistanceType.SHORTEST, cutoff=1), None)
+        self.client.single_source('v3', DistanceType.SHORTEST)
+        self.assertEqual(self.client.single_pair('v3', 'v5', DistanceType.SHORTEST), 2)
+        self.assertEqual(self.client.reach_count('v1'), 4)
+        self.assertEqual(self.client.reach_count('v5'), 3)
+
+    def test_unknown_participant(self):
+        """
+        Tests that querying an unknown participant raises EntityNotFound on the client
+        """
+        with self.assertRaises(EntityNotFound):
+            self.client.single_source('xx', DistanceType.SHORTEST)
+        with self.assertRaises(ValueError):
+            self.client._get('/single_source', source='v1', distance_type='slowest')
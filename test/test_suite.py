@@ -5,6 +5,15 @@ from .test_model import TestCommunicationNetwork, TestTimeVaryingHypergraph
 from .test_minimal_paths import TestMinimalPath, TestHypergraphPaths
 from .test_performance import TestMinimalpathPerformance
 from .test_notebook import TestNotebookPlot
+from .test_service import TestLRUCache, TestDistanceService
+from .test_preflight import TestPreflight
+from .test_all_pairs import TestAllPairs
+from .test_frames import TestDistanceFrameBuilder
+from .test_output import TestOutput
+from .test_run import TestRunSimulation
+from .test_telemetry import TestTelemetry
+from .test_reach import TestReach
+from .test_results import TestDistanceResults
 
 class TestSuite():
     def __init__(self, test_cases=[]):
@@ -14,7 +23,17 @@ class TestSuite():
             'hgp': TestHypergraphPaths,
             'cn': TestCommunicationNetwork,
             'perf': TestMinimalpathPerformance,
-            'nbk': TestNotebookPlot
+            'nbk': TestNotebookPlot,
+            'lru': TestLRUCache,
+            'svc': TestDistanceService,
+            'pre': TestPreflight,
+            'ap': TestAllPairs,
+            'frm': TestDistanceFrameBuilder,
+            'out': TestOutput,
+            'run': TestRunSimulation,
+            'tel': TestTelemetry,
+            'rch': TestReach,
+            'res': TestDistanceResults
         }
         
         self.suite = self.setup_suite(test_cases)
@@ -0,0 +1,125 @@
+import os
+import time
+import unittest
+import tempfile
+from datetime import datetime
+from concurrent.futures import Future
+from unittest.mock import patch
+
+from simulation import all_pairs_distances_by_type
+from simulation.minimal_paths import ENGINES, COUNTERS, DistanceType, supports
+from simulation.frames import DistanceFrameBuilder
+from simulation.telemetry import Telemetry, read_records, summarize
+from simulation.all_pairs import DistanceTask, ReachTask
+
+from .networks import small_network
+
+
+class TestTelemetry(unittest.TestCase):
+    def __init__(self, methodName=None):
+        super().__init__(methodName=methodName)
+        # Additional initialization
+        self.cn = small_network()
+
+    def test_relaxation_counter(self):
+        """
+        Tests that every single-source search adds its relaxations to the counter of the process
+        """
+        for engine, single_source_dijkstra in ENGINES.items():
+            for distance_type in DistanceType:
+                if not supports(engine, distance_type):
+                    continue
+                before = COUNTERS['relaxations']
+                single_source_dijkstra(self.cn, 'v1', distance_type)
+                relaxations = COUNTERS['relaxations'] - before
+                single_source_dijkstra(self.cn, 'v1', distance_type)
+
+                self.assertGreater(relaxations, 0, engine)
+                self.assertEqual(COUNTERS['relaxations'] - before, 2 * relaxations)
+
+    def test_records(self):
+        """
+        Tests the records of a run and their summary
+
+        -Computes all distances with telemetry
+        -Checks the final record for progress, worker memory, and the results held in the parent
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'telemetry.jsonl')
+            participants = sorted(self.cn.participants())
+            min_distances = DistanceFrameBuilder(participants)
+            with Telemetry(path, interval=3600) as telemetry:
+                telemetry.start('test', len(DistanceType) * len(participants), min_distances)
+                telemetry.emit()
+                for distance_type, source, distances in all_pairs_distances_by_type(self.cn, num_processes=2, telemetry=telemetry):
+                    min_distances.add(distance_type, source, distances)
+                telemetry.finish()
+                telemetry.emit()  # nothing to report after the network finished
+
+            records = read_records(path)
+
+        self.assertEqual(len(records), 2)
+        first, last = records
+        self.assertFalse(first['done'])
+        self.assertEqual(first['completed'], 0)
+        self.assertIsNone(first['eta'])
+        self.assertTrue(last['done'])
+        self.assertEqual(last['completed'], last['total'])
+        self.assertEqual(last['total'], 15)
+        self.assertEqual(last['eta'], 0)
+        self.assertEqual(last['slowest_in_flight'], [])
+        self.assertGreater(last['relaxations_per_second'], 0)
+        self.assertGreaterEqual(len(last['worker_rss']), 1)
+        self.assertEqual(last['parent_rows'], len(min_distances))
+        self.assertEqual(last['parent_bytes'], min_distances.nbytes)
+
+        summary = summarize(records)
+        self.assertIn('test: 15 of 15 sources', summary)
+        self.assertIn('done', summary)
+
+    def test_slowest_in_flight(self):
+        """
+        Tests that the longest running and not yet completed tasks are reported as slowest in flight
+
+        -Reports neither completed tasks nor tasks that still wait in the queue of the executor
+        -Labels tasks by their kind
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'telemetry.jsonl')
+            with Telemetry(path, interval=3600) as telemetry:
+                telemetry.start('test', 4)
+                tasks = [DistanceTask('hyperedges', source, DistanceType.FASTEST, datetime.min, None) for source in ('v1', 'v2', 'v3')] + [ReachTask('v4', None)]
+                futures = [Future() for _ in tasks]
+                for task, future in zip(tasks, futures):
+                    telemetry.submitted(task, future)
+                for future in (futures[0], futures[1], futures[3]):  # the third task is still queued
+                    future.set_running_or_notify_cancel()
+                telemetry.completed(tasks[0], {'pid': 1, 'seconds': 0.1, 'relaxations': 10, 'rss': 2**20})
+                telemetry.emit()
+            record, = read_records(path)
+
+        self.assertEqual([(straggler['kind'], straggler['source']) for straggler in record['slowest_in_flight']], [('fastest', 'v2'), ('reach', 'v4')])
+        self.assertEqual(record['worker_rss'], {'1': 2**20})
+        self.assertIsNotNone(record['projected_completion'])
+        self.assertIsNone(record['parent_rows'])
+
+    def test_in_flight_from_start(self):
+        """
+        Tests that the telemetry thread measures the time in flight from when a task starts running
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'telemetry.jsonl')
+            with patch('simulation.telemetry.POLL_INTERVAL', 0.05), Telemetry(path, interval=3600) as telemetry:
+                telemetry.start('test', 1)
+                task, future = ReachTask('v1', None), Future()
+                telemetry.submitted(task, future)
+                time.sleep(0.5)  # queued
+                future.set_running_or_notify_cancel()
+                time.sleep(0.3)  # running, stamped by the telemetry thread
+                telemetry.emit()
+            record, = read_records(path)
+
+        straggler, = record['slowest_in_flight']
+        self.assertEqual(straggler['kind'], 'reach')
+        self.assertGreater(straggler['seconds'], 0.1)
+        self.assertLess(straggler['seconds'], 0.5)